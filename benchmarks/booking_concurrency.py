@@ -0,0 +1,83 @@
+"""
+Fire thousands of simultaneous seat reservations at a single pass and check
+that inventory never overshoots.
+
+    python -m benchmarks.booking_concurrency --requests 5000 --stock 1000
+
+Runs against MONGODB_URL using a scratch database (DB_NAME defaults to
+navratri_pass_bench) which is dropped afterwards.
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DB_NAME", "navratri_pass_bench")
+
+from bson import ObjectId
+from fastapi import HTTPException
+from utils.mongodb import client, db
+from utils.inventory import reserve_seats
+
+
+async def _seed_pass(stock: int) -> str:
+    pass_id = ObjectId()
+    now = datetime.utcnow()
+    await db["passes"].insert_one(
+        {
+            "_id": pass_id,
+            "name": "Benchmark Daily Pass",
+            "type": "daily",
+            "price": 100.0,
+            "validity_start": now,
+            "validity_end": now + timedelta(days=1),
+            "available_quantity": stock,
+            "is_active": True,
+        }
+    )
+    return str(pass_id)
+
+
+async def _attempt(pass_id: str, quantity: int) -> bool:
+    try:
+        await reserve_seats(pass_id, quantity)
+        return True
+    except HTTPException:
+        return False
+
+
+async def main(requests: int, stock: int, quantity: int):
+    pass_id = await _seed_pass(stock)
+    try:
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(_attempt(pass_id, quantity) for _ in range(requests))
+        )
+        elapsed = time.perf_counter() - started
+
+        succeeded = sum(results)
+        remaining = (await db["passes"].find_one({"_id": ObjectId(pass_id)}))[
+            "available_quantity"
+        ]
+        expected_successes = min(requests, stock // quantity)
+
+        print(f"requests:        {requests}")
+        print(f"initial stock:   {stock}")
+        print(f"succeeded:       {succeeded} (expected {expected_successes})")
+        print(f"remaining stock: {remaining}")
+        print(f"elapsed:         {elapsed:.3f}s ({requests / elapsed:.0f} req/s)")
+
+        if remaining < 0 or succeeded * quantity + remaining != stock:
+            raise SystemExit("inventory overshoot detected")
+    finally:
+        await client.drop_database(db.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--stock", type=int, default=1000)
+    parser.add_argument("--quantity", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.stock, args.quantity))
@@ -0,0 +1,102 @@
+"""
+Compare booking N passes one request at a time with a single bulk booking.
+
+    python -m benchmarks.bulk_booking --bookings 300 --latency-ms 150
+
+Runs against MONGODB_URL using a scratch database (DB_NAME defaults to
+navratri_pass_bench) which is dropped afterwards. Razorpay is replaced by
+the local stub from benchmarks.razorpay_stub, started in-process.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DB_NAME", "navratri_pass_bench")
+os.environ.setdefault("RAZORPAY_KEY_ID", "rzp_test_bench")
+os.environ.setdefault("RAZORPAY_KEY_SECRET", "bench")
+
+import uvicorn
+from bson import ObjectId
+
+from benchmarks.payment_gateway import _free_port
+from benchmarks.razorpay_stub import create_app
+
+# Must be set before anything imports utils.config, which reads it once.
+PORT = _free_port()
+os.environ["RAZORPAY_BASE_URL"] = f"http://127.0.0.1:{PORT}/v1"
+
+from benchmarks.booking_concurrency import _seed_pass
+from models.booking import BookingCreate, BulkBookingCreate
+from utils.mongodb import client, db
+from utils.payment_service import payment_service
+from controller.bookings import (
+    create_booking_controller,
+    create_bulk_booking_controller,
+)
+
+USER = {"_id": ObjectId(), "name": "Bench Society", "email": "society@example.com"}
+
+
+async def _singles(pass_id: str, bookings: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await create_booking_controller(pass_id, BookingCreate(), USER)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(bookings)))
+    return time.perf_counter() - started
+
+
+async def _bulk(pass_id: str, bookings: int) -> float:
+    request = BulkBookingCreate(
+        pass_id=pass_id, bookings=[BookingCreate() for _ in range(bookings)]
+    )
+    started = time.perf_counter()
+    await create_bulk_booking_controller(request, USER)
+    return time.perf_counter() - started
+
+
+async def main(bookings: int, concurrency: int, latency_ms: float):
+    server = uvicorn.Server(
+        uvicorn.Config(
+            create_app(latency_ms), host="127.0.0.1", port=PORT, log_level="warning"
+        )
+    )
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    try:
+        single_elapsed = await _singles(
+            await _seed_pass(bookings), bookings, concurrency
+        )
+        bulk_elapsed = await _bulk(await _seed_pass(bookings), bookings)
+
+        created = await db["bookings"].count_documents({})
+        print(f"bookings:        {bookings} single + {bookings} bulk ({created} stored)")
+        print(
+            f"single requests: {single_elapsed:.3f}s "
+            f"({bookings / single_elapsed:.0f} bookings/s, concurrency {concurrency})"
+        )
+        print(
+            f"one bulk call:   {bulk_elapsed:.3f}s "
+            f"({bookings / bulk_elapsed:.0f} bookings/s)"
+        )
+        print(f"speed-up:        {single_elapsed / bulk_elapsed:.1f}x")
+    finally:
+        await payment_service.close()
+        server.should_exit = True
+        await server_task
+        await client.drop_database(db.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bookings", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.bookings, args.concurrency, args.latency_ms))
@@ -0,0 +1,96 @@
+"""
+Local stand-in for the parts of the Razorpay REST API the app calls, so
+booking and refund paths can be exercised without network access.
+
+    python -m benchmarks.razorpay_stub --port 9100 --latency-ms 150
+
+Then point the app at it with RAZORPAY_BASE_URL=http://127.0.0.1:9100/v1.
+--error-rate makes that fraction of calls answer 503, which is useful for
+watching the circuit breaker open and recover.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+def create_app(latency_ms: float = 0.0, error_rate: float = 0.0) -> Starlette:
+    async def _simulate():
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if error_rate and random.random() < error_rate:
+            return JSONResponse(
+                {"error": {"code": "SERVER_ERROR", "description": "stub outage"}},
+                status_code=503,
+            )
+        return None
+
+    async def create_order(request: Request):
+        failure = await _simulate()
+        if failure is not None:
+            return failure
+        body = await request.json()
+        if not isinstance(body.get("amount"), int) or body["amount"] <= 0:
+            return JSONResponse(
+                {"error": {"code": "BAD_REQUEST_ERROR", "description": "invalid amount"}},
+                status_code=400,
+            )
+        return JSONResponse(
+            {
+                "id": f"order_{uuid.uuid4().hex[:14]}",
+                "entity": "order",
+                "amount": body["amount"],
+                "currency": body.get("currency", "INR"),
+                "receipt": body.get("receipt"),
+                "status": "created",
+                "notes": body.get("notes", {}),
+                "created_at": int(time.time()),
+            }
+        )
+
+    async def refund(request: Request):
+        failure = await _simulate()
+        if failure is not None:
+            return failure
+        body = await request.json()
+        return JSONResponse(
+            {
+                "id": f"rfnd_{uuid.uuid4().hex[:14]}",
+                "entity": "refund",
+                "payment_id": request.path_params["payment_id"],
+                "amount": body.get("amount"),
+                "notes": body.get("notes", {}),
+                "status": "processed",
+                "created_at": int(time.time()),
+            }
+        )
+
+    return Starlette(
+        routes=[
+            Route("/v1/orders", create_order, methods=["POST"]),
+            Route("/v1/payments/{payment_id}/refund", refund, methods=["POST"]),
+        ]
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(args.latency_ms, args.error_rate),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
@@ -0,0 +1,95 @@
+"""
+Compare the per-row cost of rendering a page of bookings the old way
+(serialize_doc, BookingPage validation, jsonable_encoder, JSONResponse) with
+returning the raw documents in a MongoJSONResponse.
+
+    python -m benchmarks.serialization --bookings 10000 --repeat 5
+
+Documents are generated in memory with the shape BOOKING_LIST_PROJECTION
+returns, so no database is needed.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from models.booking import BookingPage
+from utils.responses import MongoJSONResponse
+from utils.serializers import serialize_list
+
+
+def _bookings(count: int):
+    now = datetime.utcnow()
+    docs = []
+    for i in range(count):
+        is_group = i % 5 == 0
+        docs.append(
+            {
+                "_id": ObjectId(),
+                "user_id": str(ObjectId()),
+                "pass_id": str(ObjectId()),
+                "zone_id": str(ObjectId()),
+                "qr_payload": f"v1.{ObjectId()}.{'a' * 43}",
+                "is_group": is_group,
+                "group_members": [
+                    {"name": f"Member {m}", "phone": f"98765{m:05d}", "entry_status": m == 0}
+                    for m in range(4)
+                ]
+                if is_group
+                else None,
+                "amount_paid": 499.0,
+                "discount_applied": 0.0,
+                "status": "active",
+                "payment_status": "paid",
+                "created_at": now - timedelta(seconds=i),
+            }
+        )
+    return docs
+
+
+def _before(docs) -> bytes:
+    page = {"items": serialize_list(docs), "next_after": None}
+    content = jsonable_encoder(BookingPage(**page), by_alias=True)
+    return JSONResponse(content).body
+
+
+def _after(docs) -> bytes:
+    return MongoJSONResponse({"items": docs, "next_after": None}).body
+
+
+def _time(render, docs, repeat: int):
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(render(docs))
+        best = min(best, time.perf_counter() - started)
+    return best, size
+
+
+def main(bookings: int, repeat: int):
+    docs = _bookings(bookings)
+    before, before_size = _time(_before, docs, repeat)
+    after, after_size = _time(_after, docs, repeat)
+
+    print(f"bookings: {bookings} (best of {repeat})")
+    print(
+        f"before:   {before * 1000:.1f}ms total, "
+        f"{before / bookings * 1e6:.2f}us/row, {before_size} bytes"
+    )
+    print(
+        f"after:    {after * 1000:.1f}ms total, "
+        f"{after / bookings * 1e6:.2f}us/row, {after_size} bytes"
+    )
+    print(f"speedup:  {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bookings", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.bookings, args.repeat)
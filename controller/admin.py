@@ -1,9 +1,15 @@
 from typing import List, Optional, Dict
-from datetime import datetime, timedelta
+from datetime import datetime
 from bson import ObjectId
 from fastapi import HTTPException
-from utils.serializers import serialize_doc, serialize_list, remove_password
+from utils.serializers import serialize_doc, serialize_list
+from utils.responses import MongoJSONResponse
 from utils.mongodb import db
+from pymongo.errors import DuplicateKeyError
+from utils.pagination import BOOKING_LIST_PROJECTION, DEFAULT_PAGE_SIZE, paginate
+from utils.export import stream_export
+from utils.stats import read_totals
+from fastapi.responses import StreamingResponse
 from models.user import UserInDB
 from models.zone import Zone
 from models.discount import Discount, DiscountCreate
@@ -11,24 +17,33 @@ from models.booking import Booking
 
 
 # -------------------- Users & Staff --------------------
-async def list_users_controller(skip: int = 0, limit: int = 100) -> List[Dict]:
-    users = await db["users"].find({"role": "user"}).skip(skip).limit(limit).to_list(None)
-    users = serialize_list(users)
-    users = remove_password(users)
-    return users
+# Password hashes and OTP state never leave the database for list views.
+USER_LIST_PROJECTION = {
+    "name": 1,
+    "email": 1,
+    "phone": 1,
+    "role": 1,
+    "zone_id": 1,
+    "created_at": 1,
+    "purchased_passes": 1,
+    "otp_verified": 1,
+}
 
 
-async def list_staffs_controller(skip: int = 0, limit: int = 100) -> List[Dict]:
-    staffs = await db["users"].find({"role": "staff"}).skip(skip).limit(limit).to_list(None)
-    staffs = serialize_list(staffs)
-    staffs = remove_password(staffs)
-    return staffs
+async def list_users_controller(skip: int = 0, limit: int = 100) -> MongoJSONResponse:
+    users = await db["users"].find({"role": "user"}, USER_LIST_PROJECTION).skip(skip).limit(limit).to_list(None)
+    return MongoJSONResponse(users)
+
+
+async def list_staffs_controller(skip: int = 0, limit: int = 100) -> MongoJSONResponse:
+    staffs = await db["users"].find({"role": "staff"}, USER_LIST_PROJECTION).skip(skip).limit(limit).to_list(None)
+    return MongoJSONResponse(staffs)
 
 
 # -------------------- Zones --------------------
-async def list_zones_controller() -> List[Dict]:
+async def list_zones_controller() -> MongoJSONResponse:
     zones = await db.zones.find().to_list(None)
-    return serialize_list(zones)
+    return MongoJSONResponse(zones)
 
 
 # -------------------- Staff Sales Report --------------------
@@ -41,66 +56,50 @@ async def get_staff_sales_report_controller(start_date: Optional[datetime] = Non
         if end_date:
             query["sale_time"]["$lte"] = end_date
 
+    # Sales carry their amount and staff name (see utils.staff_ledger), so
+    # this is one grouped scan of staff_sales with no joins.
     pipeline = [
         {"$match": query},
-        {"$lookup": {"from": "bookings", "localField": "booking_id", "foreignField": "_id", "as": "booking_info"}},
-        {"$unwind": "$booking_info"},
         {"$group": {
             "_id": "$staff_id",
+            "staff_name": {"$first": "$staff_name"},
             "total_sales": {"$sum": 1},
-            "total_amount": {"$sum": "$booking_info.amount_paid"},
+            "total_amount": {"$sum": "$amount"},
             "total_discount": {"$sum": "$discount_applied"},
         }},
-        {"$lookup": {"from": "users", "localField": "_id", "foreignField": "_id", "as": "staff_info"}},
+        {"$sort": {"total_amount": -1}},
     ]
     staff_sales = await db["staff_sales"].aggregate(pipeline).to_list(None)
     return serialize_list(staff_sales)
 
 
 # -------------------- Stats --------------------
-async def get_stats_controller(period: str = "today") -> Dict:
-    end_date = datetime.utcnow()
-    if period == "today":
-        start_date = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
-    elif period == "week":
-        start_date = end_date - timedelta(days=end_date.weekday())
-    elif period == "month":
-        start_date = end_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+async def get_stats_controller(
+    period: str = "today",
+    zone_id: Optional[str] = None,
+    pass_id: Optional[str] = None,
+) -> Dict:
+    if pass_id:
+        totals = await read_totals("pass", pass_id, period)
+    elif zone_id:
+        totals = await read_totals("zone", zone_id, period)
     else:
-        start_date = datetime.min
-
-    pipeline = [
-        {"$match": {"created_at": {"$gte": start_date, "$lte": end_date}}},
-        {"$group": {
-            "_id": None,
-            "total_bookings": {"$sum": 1},
-            "total_revenue": {"$sum": "$amount_paid"},
-            "total_attendance": {"$sum": {"$cond": [{"$eq": ["$status", "used"]}, 1, 0]}},
-            "online_bookings": {"$sum": {"$cond": [{"$eq": ["$sold_by", "online"]}, 1, 0]}},
-            "offline_bookings": {"$sum": {"$cond": [{"$ne": ["$sold_by", "online"]}, 1, 0]}},
-        }},
-    ]
-
-    stats = await db["bookings"].aggregate(pipeline).to_list(None)
-    if stats:
-        result = stats[0]
-        result.pop("_id", None)  
-        return result
-    
-    return stats[0] if stats else {
-        "total_bookings": 0,
-        "total_revenue": 0,
-        "total_attendance": 0,
-        "online_bookings": 0,
-        "offline_bookings": 0,
+        totals = await read_totals("global", "", period)
+
+    return {
+        "total_bookings": totals["bookings"],
+        "total_revenue": totals["revenue"],
+        "total_attendance": totals["attendance"],
+        "online_bookings": totals["online_bookings"],
+        "offline_bookings": totals["offline_bookings"],
+        "cancellations": totals["cancellations"],
+        "refunds": totals["refunds"],
+        "refund_amount": totals["refund_amount"],
     }
 
 
 # -------------------- Discounts --------------------
 async def create_discount_controller(discount: DiscountCreate) -> Discount:
-    if await db["discounts"].find_one({"code": discount.code}):
-        raise HTTPException(status_code=400, detail="Discount code already exists")
-    
     if discount.assigned_to:
         staff = await db["users"].find_one({"_id": ObjectId(discount.assigned_to), "role": "staff"})
         if not staff:
@@ -114,7 +113,10 @@ async def create_discount_controller(discount: DiscountCreate) -> Discount:
     discount_dict["used_by"] = []
     discount_dict["zone_id"] = discount_dict.get("zone_id")
 
-    await db["discounts"].insert_one(discount_dict)
+    try:
+        await db["discounts"].insert_one(discount_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Discount code already exists")
     return serialize_doc(discount_dict)
 
 
@@ -127,19 +129,119 @@ async def get_discounts_controller(zone_id: Optional[str] = None) -> List[Dict]:
 
 
 # -------------------- Bookings --------------------
-async def get_group_bookings_controller(status: Optional[str] = None) -> List[Dict]:
+async def get_group_bookings_controller(
+    status: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_total: bool = False,
+) -> MongoJSONResponse:
     query = {"is_group": True}
     if status:
         query["status"] = status
-    group_bookings = await db["bookings"].find(query).to_list(None)
-    return serialize_list(group_bookings)
-
-
-async def get_all_bookings_controller(zone_id: Optional[str] = None, status: Optional[str] = None) -> List[Dict]:
+    return await paginate(
+        db["bookings"], query, BOOKING_LIST_PROJECTION, after, limit, include_total
+    )
+
+
+async def get_all_bookings_controller(
+    zone_id: Optional[str] = None,
+    status: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_total: bool = False,
+) -> MongoJSONResponse:
     query = {}
     if zone_id:
         query["zone_id"] = zone_id
     if status:
         query["status"] = status
-    bookings = await db["bookings"].find(query).to_list(None)
-    return serialize_list(bookings)
+    return await paginate(
+        db["bookings"], query, BOOKING_LIST_PROJECTION, after, limit, include_total
+    )
+
+
+# -------------------- Exports --------------------
+BOOKING_EXPORT_FIELDS = [
+    "_id",
+    "user_id",
+    "pass_id",
+    "zone_id",
+    "is_group",
+    "group_members",
+    "amount_paid",
+    "discount_applied",
+    "status",
+    "payment_status",
+    "payment_id",
+    "razorpay_order_id",
+    "refund_status",
+    "refund_amount",
+    "sold_by",
+    "created_at",
+]
+
+STAFF_SALE_EXPORT_FIELDS = [
+    "_id",
+    "staff_id",
+    "staff_name",
+    "booking_id",
+    "pass_type",
+    "amount",
+    "zone_id",
+    "payment_mode",
+    "discount_applied",
+    "commission",
+    "sale_time",
+]
+
+
+def _date_range(field: str, start_date: Optional[datetime], end_date: Optional[datetime]) -> Dict:
+    if not (start_date or end_date):
+        return {}
+    bounds = {}
+    if start_date:
+        bounds["$gte"] = start_date
+    if end_date:
+        bounds["$lte"] = end_date
+    return {field: bounds}
+
+
+async def export_bookings_controller(
+    fmt: str = "ndjson",
+    zone_id: Optional[str] = None,
+    status: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    gzip: bool = False,
+) -> StreamingResponse:
+    query = _date_range("created_at", start_date, end_date)
+    if zone_id:
+        query["zone_id"] = zone_id
+    if status:
+        query["status"] = status
+    return stream_export(
+        db["bookings"],
+        query,
+        BOOKING_EXPORT_FIELDS,
+        "bookings",
+        fmt,
+        gzip,
+        sort=[("_id", 1)],
+    )
+
+
+async def export_staff_sales_controller(
+    fmt: str = "ndjson",
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    gzip: bool = False,
+) -> StreamingResponse:
+    return stream_export(
+        db["staff_sales"],
+        _date_range("sale_time", start_date, end_date),
+        STAFF_SALE_EXPORT_FIELDS,
+        "staff-sales",
+        fmt,
+        gzip,
+        sort=[("_id", 1)],
+    )
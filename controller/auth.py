@@ -4,60 +4,46 @@ from utils.serializers import serialize_doc, remove_password
 from datetime import datetime, timezone, timedelta
 from utils.config import settings
 from utils.security import (
-    verify_password,
-    get_password_hash,
-    create_access_token,
+    hash_password_async,
+    verify_password_async,
     create_access_token,
 )
 from utils.mongodb import db
+from pymongo.errors import DuplicateKeyError
 from models.user import UserCreate, User, UserLogin
-from twilio.rest import Client
-
-account_sid = settings.ACCOUNT_SID
-auth_token = settings.AUTH_TOKEN
-twilio_service_sid = settings.TWILIO_SERVICE_SID
-client = Client(account_sid, auth_token)
-fake_db = {}
+from utils.otp_service import otp_backend, send_otp_in_background
+from starlette.background import BackgroundTask
 
 
 async def register(user: UserCreate, request: Request):
-    if await db.users.find_one({"email": str(user.email)}):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
-        )
-    if await db.users.find_one({"phone": str(user.phone)}):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Phone number already registered"
-        )
-
     zone_id = request.query_params.get("zone_id")
     user_dict = user.dict()
-    user_dict["password"] = get_password_hash(user_dict.pop("password"))
+    user_dict["password"] = await hash_password_async(user_dict.pop("password"))
     user_dict["created_at"] = datetime.now(timezone.utc)
     user_dict["updated_at"] = datetime.now(timezone.utc)
     user_dict["zone_id"] = zone_id
     user_dict["otp_verified"] = False 
 
-    result = await db.users.insert_one(user_dict)
+    # The unique indexes on email and phone (utils/indexes.py) reject
+    # duplicates atomically; there is no separate existence check to race.
+    try:
+        result = await db.users.insert_one(user_dict)
+    except DuplicateKeyError as e:
+        if "phone" in (e.details or {}).get("keyPattern", {}):
+            detail = "Phone number already registered"
+        else:
+            detail = "Email already registered"
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
     if not result:
         raise HTTPException(status_code=500, detail="User registration failed")
 
-    try:
-        client.verify.v2.services(twilio_service_sid).verifications.create(
-            to=user.phone, channel="sms"
-        )
-        await db.users.update_one(
-            {"phone": user.phone},
-            {"$set": {"otp_sent_at": datetime.now(timezone.utc)}}
-        )
-    except Exception as e:
-        print(f"Error sending OTP: {e}")
-        raise HTTPException(status_code=500, detail="Failed to send OTP")
-
-    return JSONResponse({
-        "message": "User registered successfully. OTP sent to your phone.",
-        "phone": user.phone
-    })
+    return JSONResponse(
+        {
+            "message": "User registered successfully. OTP is being sent to your phone.",
+            "phone": user.phone
+        },
+        background=BackgroundTask(send_otp_in_background, user.phone),
+    )
 
 
 async def login(request: Request, credentials: UserLogin):
@@ -85,11 +71,16 @@ async def login(request: Request, credentials: UserLogin):
         )
 
     encrypted_password = user_dict.get("password")
-    if not verify_password(password, encrypted_password):
+    password_valid, new_hash = await verify_password_async(password, encrypted_password)
+    if not password_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect password",
         )
+    if new_hash:
+        await db.users.update_one(
+            {"_id": user_dict["_id"]}, {"$set": {"password": new_hash}}
+        )
 
     access_token_expires = timedelta(hours=int(settings.ACCESS_TOKEN_EXPIRE_TIME))
     print(access_token_expires)
@@ -105,17 +96,20 @@ async def verify_otp_controller(phone: str, otp_code: str):
     if not user:
         raise HTTPException(status_code=404, detail="User with this phone not found")
     try:
-        verification_check = client.verify.v2.services(
-            twilio_service_sid
-        ).verification_checks.create(to=phone, code=otp_code)
-
-        if verification_check.status == "approved":
-            if phone in fake_db:
-                fake_db[phone]["otp_verified"] = True
-                fake_db[phone]["otp_verified_at"] = datetime.now()
-            return {"status": "success", "message": "OTP verified successfully"}
-        else:
-            return {"status": "failed", "message": "Invalid OTP"}
-
+        approved = await otp_backend.check(phone, otp_code)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        print(f"Error verifying OTP: {e}")
+        raise HTTPException(status_code=502, detail="Failed to verify OTP")
+
+    if approved:
+        await db.users.update_one(
+            {"_id": user["_id"]},
+            {
+                "$set": {
+                    "otp_verified": True,
+                    "otp_verified_at": datetime.now(timezone.utc),
+                }
+            },
+        )
+        return {"status": "success", "message": "OTP verified successfully"}
+    return {"status": "failed", "message": "Invalid OTP"}
@@ -1,86 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from typing import List, Optional
 from utils.mongodb import db
 from fastapi.responses import JSONResponse
-from models.booking import BookingCreate, BookingInDB, Booking, BookingUpdate
+from models.booking import (
+    BookingCreate,
+    BookingInDB,
+    Booking,
+    BookingUpdate,
+    BulkBookingCreate,
+)
 from models.user import UserInDB
 from utils.security import get_current_user
-from utils.qr_service import generate_qr_code
+from utils.qr_service import qr_renderer
+from utils.qr_token import issue_qr_token
 from bson import ObjectId
-import qrcode
-import base64
-from utils.serializers import serialize_doc, serialize_list
+import hashlib
+from utils.serializers import serialize_doc
 from datetime import datetime
-from io import BytesIO
-from utils.payment_service import PaymentService
+from utils.payment_service import payment_service
+from utils.inventory import reserve_seats, release_seats
+from utils.holds import cancel_holds, create_hold, create_holds
+from utils.cache import LRUCache, etag_matches
+from utils.idempotency import run_idempotent
+from utils.pagination import BOOKING_LIST_PROJECTION, DEFAULT_PAGE_SIZE, paginate
+from utils.stats import booking_created_event, record_event, record_events
+from utils.config import settings
 
-payment_service = PaymentService()
+qr_image_cache = LRUCache(maxsize=settings.QR_CACHE_SIZE)
+QR_CACHE_CONTROL = "private, max-age=86400, immutable"
+MAX_BULK_BOOKINGS = 500
 
 
 async def create_booking_controller(
     pass_id: str,
     booking: BookingCreate,
     current_user: UserInDB = Depends(get_current_user),
+    idempotency_key: Optional[str] = None,
 ):
+    return await run_idempotent(
+        idempotency_key,
+        str(current_user["_id"]),
+        "create_booking",
+        f"{pass_id}:{booking.json()}",
+        lambda: _create_booking(pass_id, booking, current_user),
+    )
 
-    try:
-        pass_ = await db["passes"].find_one({"_id": ObjectId(pass_id)})
-    except:
-        raise HTTPException(status_code=400, detail="Invalid pass ID format")
-
-    if not pass_:
-        raise HTTPException(status_code=404, detail="Pass not found")
 
-    if not pass_.get("is_active", False):
-        raise HTTPException(status_code=400, detail="Pass is inactive")
+async def _create_booking(
+    pass_id: str,
+    booking: BookingCreate,
+    current_user: UserInDB,
+):
+    quantity_requested = len(booking.group_members or []) or 1
+    pass_ = await reserve_seats(pass_id, quantity_requested)
 
-    now = datetime.utcnow()
-    validity_end = pass_.get("validity_end")
+    held: List[ObjectId] = []
+    try:
+        return await _complete_booking(
+            pass_id, pass_, booking, quantity_requested, current_user, held
+        )
+    except BaseException:
+        await _roll_back(pass_id, quantity_requested, held)
+        raise
 
-    if validity_end and now > validity_end:
-        raise HTTPException(status_code=400, detail="Pass validity has expired")
 
-    group_size_allowed = pass_.get("group_size", 0)
-    booking_is_group = group_size_allowed > 1
+async def _roll_back(pass_id: str, quantity: int, held: List[ObjectId]):
+    """
+    Give back the seats of a booking attempt that failed. Once its holds may
+    have been written they are cancelled first, otherwise the sweeper would
+    return the same seats again when they expire.
+    """
+    if held:
+        await cancel_holds(held)
+    await release_seats(pass_id, quantity)
 
-    quantity_requested = 1
-    if booking_is_group:
-        if not booking.group_members or len(booking.group_members) == 0:
-            raise HTTPException(
-                status_code=400,
-                detail="Group members required for group booking",
-            )
-        quantity_requested = len(booking.group_members)
-        if quantity_requested > group_size_allowed:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Group size exceeds allowed limit ({group_size_allowed})",
-            )
-    else:
-        if booking.group_members and len(booking.group_members) > 1:
-            raise HTTPException(
-                status_code=400,
-                detail="Single pass cannot include multiple group members",
-            )
 
-    available_quantity = pass_.get("available_quantity", 0)
-    if available_quantity < quantity_requested:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Only {available_quantity} passes are available",
-        )
+async def _complete_booking(
+    pass_id: str,
+    pass_: dict,
+    booking: BookingCreate,
+    quantity_requested: int,
+    current_user: UserInDB,
+    held: List[ObjectId],
+):
+    now = datetime.utcnow()
+    booking_is_group = _check_group_members(pass_, booking, quantity_requested)
 
     amount = pass_["price"] * quantity_requested
     zone_id = str(pass_.get("zone_id"))
 
-    if not getattr(booking, "discount_applied", None) and pass_.get("pricing_rules"):
-        for rule in pass_["pricing_rules"]:
-            valid_until = rule.get("valid_until")
-            if valid_until and now <= valid_until:
-                if rule.get("discount_percentage"):
-                    amount -= amount * (rule["discount_percentage"] / 100)
-                elif rule.get("fixed_price") and rule["fixed_price"] > 0:
-                    amount = rule["fixed_price"] * quantity_requested
+    if not getattr(booking, "discount_applied", None):
+        amount = _apply_pricing_rules(pass_, amount, quantity_requested, now)
 
     if getattr(booking, "discount_applied", None):
         discount = await db["discounts"].find_one(
@@ -112,7 +122,7 @@ async def create_booking_controller(
             },
         )
     try:
-        order_info = payment_service.create_razorpay_order(
+        order_info = await payment_service.create_razorpay_order(
             username=current_user["name"],
             email=current_user["email"],
             product=pass_["name"],
@@ -125,37 +135,23 @@ async def create_booking_controller(
         raise HTTPException(status_code=500, detail="Failed to create payment order")
 
     if order_info and order_info.get("order_id"):
-        booking_dict = booking.dict(exclude={"is_group"})
-        booking_dict["_id"] = ObjectId()
-        booking_dict["is_group"] = booking_is_group
-        booking_dict["user_id"] = str(current_user["_id"])
-        booking_dict["pass_id"] = str(pass_id)
-        booking_dict["zone_id"] = zone_id
-        booking_dict["amount_paid"] = amount
-        booking_dict["status"] = "pending_payment"
-        booking_dict["razorpay_order_id"] = order_info["order_id"]
-        booking_dict["created_at"] = datetime.utcnow()
-
-        try:
-            qr = qrcode.QRCode(version=1, box_size=10, border=5)
-            qr.add_data(str(booking_dict["_id"]))
-            qr.make(fit=True)
-            qr_img = qr.make_image(fill_color="black", back_color="white")
-
-            buffered = BytesIO()
-            qr_img.save(buffered, format="PNG")
-            booking_dict["qr_code"] = base64.b64encode(buffered.getvalue()).decode()
-        except Exception as e:
-            print("Warning: QR generation failed:", e)
-            booking_dict["qr_code"] = None
+        booking_dict = _new_booking_doc(
+            booking,
+            pass_id,
+            pass_,
+            current_user,
+            booking_is_group,
+            quantity_requested,
+            amount,
+            order_info["order_id"],
+        )
 
+        held.append(booking_dict["_id"])
+        await create_hold(booking_dict["_id"], pass_id, quantity_requested)
         booking_result = await db["bookings"].insert_one(booking_dict)
-        await db["passes"].update_one(
-            {"_id": ObjectId(pass_id)},
-            {"$inc": {"available_quantity": -quantity_requested}},
-        )
 
         if booking_result.inserted_id:
+            await record_events([booking_created_event(booking_dict)])
             return JSONResponse(
                 {
                     "message": "Booking created successfully",
@@ -171,6 +167,186 @@ async def create_booking_controller(
     raise HTTPException(status_code=400, detail="Payment order generation failed")
 
 
+def _check_group_members(pass_: dict, booking: BookingCreate, quantity: int) -> bool:
+    """Validate the group members against the pass; returns whether it is a group pass."""
+    group_size_allowed = pass_.get("group_size", 0) or 0
+    booking_is_group = group_size_allowed > 1
+
+    if booking_is_group:
+        if not booking.group_members or len(booking.group_members) == 0:
+            raise HTTPException(
+                status_code=400,
+                detail="Group members required for group booking",
+            )
+        if quantity > group_size_allowed:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Group size exceeds allowed limit ({group_size_allowed})",
+            )
+    else:
+        if booking.group_members and len(booking.group_members) > 1:
+            raise HTTPException(
+                status_code=400,
+                detail="Single pass cannot include multiple group members",
+            )
+    return booking_is_group
+
+
+def _apply_pricing_rules(pass_: dict, amount: float, quantity: int, now: datetime) -> float:
+    for rule in pass_.get("pricing_rules") or []:
+        valid_until = rule.get("valid_until")
+        if valid_until and now <= valid_until:
+            if rule.get("discount_percentage"):
+                amount -= amount * (rule["discount_percentage"] / 100)
+            elif rule.get("fixed_price") and rule["fixed_price"] > 0:
+                amount = rule["fixed_price"] * quantity
+    return amount
+
+
+def _new_booking_doc(
+    booking: BookingCreate,
+    pass_id: str,
+    pass_: dict,
+    current_user: UserInDB,
+    booking_is_group: bool,
+    quantity: int,
+    amount: float,
+    order_id: str,
+) -> dict:
+    zone_id = str(pass_.get("zone_id"))
+    booking_dict = booking.dict(exclude={"is_group"})
+    booking_dict["_id"] = ObjectId()
+    booking_dict["is_group"] = booking_is_group
+    booking_dict["user_id"] = str(current_user["_id"])
+    booking_dict["pass_id"] = str(pass_id)
+    booking_dict["pass_type"] = pass_.get("type")
+    booking_dict["zone_id"] = zone_id
+    booking_dict["amount_paid"] = amount
+    booking_dict["status"] = "pending_payment"
+    booking_dict["razorpay_order_id"] = order_id
+    booking_dict["created_at"] = datetime.utcnow()
+
+    booking_dict["qr_payload"] = issue_qr_token(
+        booking_dict["_id"],
+        zone_id,
+        pass_.get("validity_start"),
+        pass_.get("validity_end"),
+        quantity,
+    )
+    return booking_dict
+
+
+async def create_bulk_booking_controller(
+    request: BulkBookingCreate,
+    current_user: UserInDB = Depends(get_current_user),
+    idempotency_key: Optional[str] = None,
+):
+    return await run_idempotent(
+        idempotency_key,
+        str(current_user["_id"]),
+        "bulk_booking",
+        request.json(),
+        lambda: _create_bulk_booking(request, current_user),
+    )
+
+
+async def _create_bulk_booking(request: BulkBookingCreate, current_user: UserInDB):
+    """
+    Book many passes of one type for a single buyer. Seats for the whole
+    batch are taken with one conditional update and paid for with one
+    Razorpay order; the bookings and their holds are each written with one
+    insert_many.
+    """
+    if not request.bookings:
+        raise HTTPException(status_code=400, detail="No bookings provided")
+    if len(request.bookings) > MAX_BULK_BOOKINGS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BULK_BOOKINGS} bookings per request",
+        )
+
+    quantities = [len(booking.group_members or []) or 1 for booking in request.bookings]
+    total_quantity = sum(quantities)
+    pass_ = await reserve_seats(request.pass_id, total_quantity)
+
+    held: List[ObjectId] = []
+    try:
+        return await _complete_bulk_booking(
+            request.pass_id, pass_, request.bookings, quantities, current_user, held
+        )
+    except BaseException:
+        await _roll_back(request.pass_id, total_quantity, held)
+        raise
+
+
+async def _complete_bulk_booking(
+    pass_id: str,
+    pass_: dict,
+    bookings: List[BookingCreate],
+    quantities: List[int],
+    current_user: UserInDB,
+    held: List[ObjectId],
+):
+    now = datetime.utcnow()
+    priced = []
+    for booking, quantity in zip(bookings, quantities):
+        booking_is_group = _check_group_members(pass_, booking, quantity)
+        amount = _apply_pricing_rules(pass_, pass_["price"] * quantity, quantity, now)
+        priced.append((booking, quantity, booking_is_group, amount))
+    total_amount = sum(amount for _, _, _, amount in priced)
+
+    try:
+        order_info = await payment_service.create_razorpay_order(
+            username=current_user["name"],
+            email=current_user["email"],
+            product=f"{pass_['name']} x {len(bookings)}",
+            amount=total_amount,
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        print("Unexpected payment error:", e)
+        raise HTTPException(status_code=500, detail="Failed to create payment order")
+
+    if not order_info or not order_info.get("order_id"):
+        raise HTTPException(status_code=400, detail="Payment order generation failed")
+
+    booking_docs = [
+        _new_booking_doc(
+            booking,
+            pass_id,
+            pass_,
+            current_user,
+            booking_is_group,
+            quantity,
+            amount,
+            order_info["order_id"],
+        )
+        for booking, quantity, booking_is_group, amount in priced
+    ]
+
+    held.extend(doc["_id"] for doc in booking_docs)
+    await create_holds(
+        pass_id,
+        {doc["_id"]: quantity for doc, quantity in zip(booking_docs, quantities)},
+        now,
+    )
+    result = await db["bookings"].insert_many(booking_docs)
+    if len(result.inserted_ids) != len(booking_docs):
+        raise HTTPException(status_code=500, detail="Booking creation failed")
+    await record_events([booking_created_event(doc) for doc in booking_docs])
+
+    return JSONResponse(
+        {
+            "message": f"{len(booking_docs)} bookings created successfully",
+            "order_id": order_info["order_id"],
+            "amount": order_info["amount"],
+            "currency": order_info["currency"],
+            "booking_ids": [str(doc["_id"]) for doc in booking_docs],
+        }
+    )
+
+
 async def get_booking_controller(
     booking_id: str, current_user: UserInDB = Depends(get_current_user)
 ):
@@ -197,6 +373,20 @@ async def get_booking_controller(
 async def cancel_booking_controller(
     booking_id: str,
     current_user: UserInDB = Depends(get_current_user),
+    idempotency_key: Optional[str] = None,
+):
+    return await run_idempotent(
+        idempotency_key,
+        str(current_user["_id"]),
+        "cancel_booking",
+        booking_id,
+        lambda: _cancel_booking(booking_id, current_user),
+    )
+
+
+async def _cancel_booking(
+    booking_id: str,
+    current_user: UserInDB,
 ):
     try:
         booking = await db["bookings"].find_one({"_id": ObjectId(booking_id)})
@@ -248,12 +438,10 @@ async def cancel_booking_controller(
             },
         )
 
-        await db["passes"].update_one(
-            {"_id": ObjectId(booking["pass_id"])},
-            {"$inc": {"available_quantity": quantity_to_restore}},
-        )
+        await release_seats(booking["pass_id"], quantity_to_restore)
 
         if update_result.modified_count == 1:
+            await record_event(booking.get("zone_id"), booking["pass_id"], cancellations=1)
             return JSONResponse({"message": "Booking cancelled (no payment to refund)"})
         else:
             raise HTTPException(status_code=500, detail="Booking cancellation failed")
@@ -294,12 +482,16 @@ async def cancel_booking_controller(
             {"$set": update_fields},
         )
 
-        await db["passes"].update_one(
-            {"_id": ObjectId(booking["pass_id"])},
-            {"$inc": {"available_quantity": quantity_to_restore}},
-        )
+        await release_seats(booking["pass_id"], quantity_to_restore)
 
         if result.modified_count == 1:
+            await record_event(
+                booking.get("zone_id"),
+                booking["pass_id"],
+                cancellations=1,
+                refunds=1,
+                refund_amount=refunded_amount,
+            )
             return JSONResponse(
                 {
                     "message": "Booking cancelled and refunded successfully",
@@ -317,21 +509,72 @@ async def cancel_booking_controller(
 
 
 async def get_user_bookings_controller(
-    user_id: str, current_user: UserInDB = Depends(get_current_user)
+    user_id: str,
+    current_user: UserInDB = Depends(get_current_user),
+    after: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_total: bool = False,
 ):
     # Check if user is requesting their own bookings or is staff/admin
     if user_id != str(current_user.id) and current_user.role not in ["staff", "admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    bookings = await db["bookings"].find({"user_id": user_id}).to_list(None)
-
-    return serialize_list(bookings)
+    return await paginate(
+        db["bookings"],
+        {"user_id": user_id},
+        BOOKING_LIST_PROJECTION,
+        after,
+        limit,
+        include_total,
+    )
 
 
 async def get_user_own_bookings_controller(
     current_user: UserInDB = Depends(get_current_user),
+    after: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_total: bool = False,
 ):
-    user_id = str(current_user.id)
-    bookings = await db["bookings"].find({"user_id": user_id}).to_list(None)
+    return await paginate(
+        db["bookings"],
+        {"user_id": str(current_user.id)},
+        BOOKING_LIST_PROJECTION,
+        after,
+        limit,
+        include_total,
+    )
+
+
+async def get_booking_qr_controller(
+    booking_id: str,
+    current_user: UserInDB,
+    if_none_match: Optional[str] = None,
+) -> Response:
+    try:
+        booking = await db["bookings"].find_one(
+            {"_id": ObjectId(booking_id)}, {"user_id": 1, "qr_payload": 1}
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid booking ID format"
+        )
+
+    if not booking:
+        raise HTTPException(status_code=404, detail="Booking not found")
+
+    if str(booking.get("user_id")) != str(current_user["_id"]) and current_user.get(
+        "role"
+    ) not in ["staff", "admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
 
-    return serialize_list(bookings)
\ No newline at end of file
+    payload = booking.get("qr_payload") or str(booking["_id"])
+    etag = '"%s"' % hashlib.sha256(payload.encode()).hexdigest()[:32]
+    headers = {"ETag": etag, "Cache-Control": QR_CACHE_CONTROL}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    png = qr_image_cache.get(payload)
+    if png is None:
+        png = await qr_renderer.render(payload)
+        qr_image_cache.set(payload, png)
+    return Response(content=png, media_type="image/png", headers=headers)
\ No newline at end of file
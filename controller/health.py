@@ -0,0 +1,16 @@
+from fastapi import status
+from fastapi.responses import JSONResponse
+from utils.lifecycle import lifecycle
+
+
+async def liveness_controller() -> JSONResponse:
+    return JSONResponse({"status": "alive"})
+
+
+async def readiness_controller() -> JSONResponse:
+    if lifecycle.ready:
+        return JSONResponse({"status": "ready", "in_flight": lifecycle.in_flight})
+    return JSONResponse(
+        {"status": "draining" if lifecycle.draining else "warming up"},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
@@ -1,17 +1,18 @@
-from typing import Optional, List
-from fastapi import HTTPException, status
+from typing import Optional
+from fastapi import HTTPException, Response, status
 from fastapi.responses import JSONResponse
 from bson import ObjectId
 from datetime import datetime
 from models.user import UserInDB
 from utils.mongodb import db
-from utils.serializers import serialize_doc, serialize_list
+from utils.serializers import serialize_doc
+from utils.cache_bus import CacheEvent, CacheEventKind, cache_bus
+from utils.catalog import pass_catalog
 from models.passes import PassCreate, PassUpdate
 
 
-async def list_passes_controller() -> List[dict]:
-    passes = await db.passes.find({"is_active": True}).to_list(None)
-    return serialize_list(passes)
+async def list_passes_controller(if_none_match: Optional[str] = None) -> Response:
+    return await pass_catalog.response(if_none_match)
 
 
 async def get_pass_controller(pass_id: str):
@@ -40,6 +41,7 @@ async def create_pass_controller(
     pass_dict["zone_id"] = zone_id
     pass_dict["created_by"] = str(current_admin.id)
     result = await db.passes.insert_one(pass_dict)
+    await cache_bus.publish(CacheEvent(CacheEventKind.PASS, str(pass_dict["_id"])))
     if result.inserted_id:
         return JSONResponse({"message": "Pass created successfully"})
     return JSONResponse({"message": "Pass creation failed"})
@@ -59,6 +61,7 @@ async def create_group_pass_controller(
     pass_dict["zone_id"] = zone_id
     pass_dict["created_by"] = str(current_admin.id)
     result = await db.passes.insert_one(pass_dict)
+    await cache_bus.publish(CacheEvent(CacheEventKind.PASS, str(pass_dict["_id"])))
     if result.inserted_id:
         return JSONResponse({"message": "Group Pass created successfully"})
     return JSONResponse({"message": "Group Pass creation failed"})
@@ -79,6 +82,7 @@ async def update_pass_controller(pass_id: str, pass_update: PassUpdate) -> dict:
         )
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Pass not found")
+    await cache_bus.publish(CacheEvent(CacheEventKind.PASS, pass_id))
     return {"message": "Pass updated successfully"}
 
 
@@ -91,6 +95,7 @@ async def delete_pass_controller(pass_id: str) -> JSONResponse:
         )
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Pass not found")
+    await cache_bus.publish(CacheEvent(CacheEventKind.PASS, pass_id))
     return JSONResponse({"message": "Pass deleted successfully"})
 
 
@@ -119,6 +124,7 @@ async def toggle_pass_controller(pass_id: str) -> dict:
 
     if result.modified_count == 0:
         raise HTTPException(status_code=500, detail="Failed to toggle pass status")
+    await cache_bus.publish(CacheEvent(CacheEventKind.PASS, pass_id))
 
     status_str = "activated" if new_status else "deactivated"
     return {"message": f"Pass {status_str} successfully"}
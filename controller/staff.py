@@ -1,10 +1,13 @@
-from typing import List
+from typing import List, Optional
 from fastapi import HTTPException, status
 from fastapi.responses import JSONResponse
 from bson import ObjectId
 from datetime import datetime
 from utils.mongodb import db
 from utils.serializers import  serialize_list
+from utils.pagination import DEFAULT_PAGE_SIZE, paginate
+from utils.stats import record_event
+from utils.staff_ledger import ledger_fields, pass_type_for
 from models.user import UserInDB
 from models.staff_sale import StaffSale
 
@@ -29,27 +32,62 @@ async def verify_booking_controller(booking_id: str, current_user: UserInDB) ->
     if booking["status"] != "active":
         raise HTTPException(status_code=400, detail="Booking already used or cancelled")
 
-    await db["bookings"].update_one({"_id": ObjectId(booking_id)}, {"$set": {"status": "used"}})
+    marked = await db["bookings"].update_one(
+        {"_id": ObjectId(booking_id), "status": "active"},
+        {"$set": {"status": "used", "used_at": datetime.utcnow()}},
+    )
+    if marked.modified_count == 0:
+        raise HTTPException(status_code=400, detail="Booking already used or cancelled")
+    await record_event(booking.get("zone_id"), booking.get("pass_id"), attendance=1)
 
     staff_sale = {
         "staff_id": str(current_user.id),
         "booking_id": booking_id,
-        "zone_id": current_user.zone_id,
         "payment_mode": "cash",
         "sale_time": datetime.utcnow(),
-        "commission": None
+        "commission": None,
+        **ledger_fields(
+            {**booking, "zone_id": current_user.zone_id},
+            await pass_type_for(booking),
+            getattr(current_user, "name", None),
+        ),
     }
     await db["staff_sales"].insert_one(staff_sale)
 
     return JSONResponse({"message": "Booking verified successfully"})
 
 
-async def get_staff_sales_controller(current_user: UserInDB) -> List[dict]:
+STAFF_SALE_LIST_PROJECTION = {
+    "staff_id": 1,
+    "booking_id": 1,
+    "discount_applied": 1,
+    "payment_mode": 1,
+    "zone_id": 1,
+    "sale_time": 1,
+    "commission": 1,
+    "amount": 1,
+    "pass_type": 1,
+    "staff_name": 1,
+}
+
+
+async def get_staff_sales_controller(
+    current_user: UserInDB,
+    after: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_total: bool = False,
+) -> JSONResponse:
     if current_user.role != "staff":
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    sales = await db["staff_sales"].find({"staff_id": str(current_user.id)}).to_list(None)
-    return serialize_list(sales)
+    return await paginate(
+        db["staff_sales"],
+        {"staff_id": str(current_user.id)},
+        STAFF_SALE_LIST_PROJECTION,
+        after,
+        limit,
+        include_total,
+    )
 
 
 async def get_staff_discounts_controller(current_user: UserInDB) -> List[dict]:
@@ -1,25 +1,99 @@
 from fastapi import HTTPException
 from bson import ObjectId
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
+from pymongo import ReturnDocument, UpdateOne
 from utils.mongodb import db
-from utils.serializers import serialize_doc
 from models.user import UserInDB
-from models.booking import BookingStatus
+from models.booking import BookingStatus, ScanEntry
+from utils.gate_cache import gate_cache
+from utils.stats import record_event, record_events
+from datetime import datetime
+from utils.qr_token import (
+    InvalidQRToken,
+    QRClaims,
+    decode_qr_token,
+    is_qr_token,
+    validity_error,
+)
+
+MAX_BATCH_SCANS = 1000
+
+
+def _check_staff_zone(current_user: UserInDB, zone_id) -> None:
+    staff_zone = getattr(current_user, "zone_id", None)
+    if not staff_zone:
+        raise HTTPException(status_code=400, detail="Staff zone not assigned")
+    if str(staff_zone) != str(zone_id):
+        raise HTTPException(status_code=403, detail="Booking does not belong to your zone")
+
+
+def _parse_qr_code(qr_code: str) -> Tuple[ObjectId, Optional[QRClaims]]:
+    """
+    Resolve a scanned payload to its booking id. Signed tokens also return
+    their verified claims; legacy payloads are bare ObjectIds.
+    """
+    if is_qr_token(qr_code):
+        claims = decode_qr_token(qr_code)
+        return claims.booking_id, claims
+    try:
+        return ObjectId(qr_code), None
+    except Exception:
+        raise InvalidQRToken("Invalid QR code")
+
 
 async def validate_qr_controller(qr_code: str, current_user: UserInDB) -> Dict:
     if current_user.role not in ["staff", "admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    booking = await db["bookings"].find_one({"_id": ObjectId(qr_code)})
-    if not booking:
+    try:
+        booking_id, claims = _parse_qr_code(qr_code)
+    except InvalidQRToken:
         raise HTTPException(status_code=404, detail="Invalid QR code")
 
+    if claims:
+        # Signed tickets are checked for zone and validity window before
+        # touching the database.
+        if current_user.role == "staff":
+            _check_staff_zone(current_user, claims.zone_id)
+        reason = validity_error(claims)
+        if reason:
+            return {"valid": False, "message": reason}
+
+    staff_zone = None
     if current_user.role == "staff":
         staff_zone = getattr(current_user, "zone_id", None)
         if not staff_zone:
             raise HTTPException(status_code=400, detail="Staff zone not assigned")
-        if str(staff_zone) != str(booking.get("zone_id")):
-            raise HTTPException(status_code=403, detail="Booking does not belong to your zone")
+        gate_cache.warm_zone(staff_zone)
+
+    booking = gate_cache.peek(booking_id)
+    if booking is None or (booking["status"] == "active" and not booking.get("is_group", False)):
+        # The conditional update both checks and marks the entry, so an
+        # accepted scan costs one round trip and two gates can never admit
+        # the same ticket.
+        entry_filter = {"_id": booking_id, "status": "active", "is_group": {"$ne": True}}
+        if staff_zone:
+            entry_filter["zone_id"] = str(staff_zone)
+        marked = await db["bookings"].find_one_and_update(
+            entry_filter,
+            {"$set": {"status": BookingStatus.USED.value, "used_at": datetime.utcnow()}},
+            projection={"zone_id": 1, "pass_id": 1},
+        )
+        if marked:
+            gate_cache.update(booking_id, {"status": BookingStatus.USED.value})
+            await record_event(marked.get("zone_id"), marked.get("pass_id"), attendance=1)
+            return {
+                "valid": True,
+                "is_group": False,
+                "message": "Entry validated successfully"
+            }
+        booking = await gate_cache.refresh(booking_id)
+
+    if not booking:
+        raise HTTPException(status_code=404, detail="Invalid QR code")
+
+    if current_user.role == "staff":
+        _check_staff_zone(current_user, booking.get("zone_id"))
 
     if booking["status"] != "active":
         return {"valid": False, "message": f"Pass is {booking['status']}"}
@@ -45,52 +119,330 @@ async def validate_qr_controller(qr_code: str, current_user: UserInDB) -> Dict:
             "message": "Group booking validated, select member to mark entry."
         }
 
-    await db["bookings"].update_one(
-        {"_id": ObjectId(qr_code)},
-        {"$set": {"status": BookingStatus.USED}}
-    )
+    raise HTTPException(status_code=409, detail="Booking changed during validation, please rescan")
 
-    return {
-        "valid": True,
-        "is_group": False,
-        "message": "Entry validated successfully"
+
+def _member_entry_update(
+    member_index: int, extra: Optional[Dict] = None, used_at: Optional[datetime] = None
+) -> List[Dict]:
+    """
+    Pipeline update that marks one group member as entered and, in the same
+    write, flips the booking to used once every member has entered. Members
+    without an entry_status count as not entered. used_at defaults to the
+    server's clock.
+    """
+    marked = {"entry_status": True, **(extra or {})}
+    all_entered = {
+        "$allElementsTrue": [
+            {
+                "$map": {
+                    "input": "$group_members",
+                    "as": "m",
+                    "in": {"$ifNull": ["$$m.entry_status", False]},
+                }
+            }
+        ]
     }
+    return [
+        {
+            "$set": {
+                "group_members": {
+                    "$map": {
+                        "input": {"$range": [0, {"$size": "$group_members"}]},
+                        "as": "i",
+                        "in": {
+                            "$cond": [
+                                {"$eq": ["$$i", member_index]},
+                                {"$mergeObjects": [{"$arrayElemAt": ["$group_members", "$$i"]}, marked]},
+                                {"$arrayElemAt": ["$group_members", "$$i"]},
+                            ]
+                        },
+                    }
+                }
+            }
+        },
+        {
+            "$set": {
+                "status": {
+                    "$cond": [
+                        all_entered,
+                        BookingStatus.USED.value,
+                        "$status",
+                    ]
+                },
+                "used_at": {
+                    "$cond": [
+                        all_entered,
+                        used_at if used_at is not None else "$$NOW",
+                        "$used_at",
+                    ]
+                },
+            }
+        },
+    ]
+
+
+def _member_entry_filter(booking_id: ObjectId, member_index: int, zone_id=None) -> Dict:
+    entry_filter = {
+        "_id": booking_id,
+        "is_group": True,
+        "status": "active",
+        f"group_members.{member_index}": {"$exists": True},
+        f"group_members.{member_index}.entry_status": {"$ne": True},
+    }
+    if zone_id:
+        entry_filter["zone_id"] = str(zone_id)
+    return entry_filter
 
 
 async def validate_group_member_entry_controller(booking_id: str, member_index: int, current_user: UserInDB) -> Dict:
     if current_user.role not in ["staff", "admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    booking = await db["bookings"].find_one({"_id": ObjectId(booking_id)})
-    if not booking or not booking.get("is_group", False):
+    try:
+        booking_oid = ObjectId(booking_id)
+    except Exception:
         raise HTTPException(status_code=404, detail="Invalid or non-group booking")
 
+    staff_zone = None
     if current_user.role == "staff":
         staff_zone = getattr(current_user, "zone_id", None)
         if not staff_zone:
             raise HTTPException(status_code=400, detail="Staff zone not assigned")
-        if str(staff_zone) != str(booking.get("zone_id")):
-            raise HTTPException(status_code=403, detail="Booking does not belong to your zone")
+
+    if member_index >= 0:
+        updated = await db["bookings"].find_one_and_update(
+            _member_entry_filter(booking_oid, member_index, staff_zone),
+            _member_entry_update(member_index),
+            projection={"status": 1, "group_members": 1, "zone_id": 1, "pass_id": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if updated:
+            all_entered = updated["status"] == BookingStatus.USED.value
+            gate_cache.update(
+                booking_oid,
+                {"group_members": updated["group_members"], "status": updated["status"]},
+            )
+            if all_entered:
+                await record_event(updated.get("zone_id"), updated.get("pass_id"), attendance=1)
+            return {
+                "success": True,
+                "message": "Member entry validated successfully",
+                "all_entered": all_entered
+            }
+
+    # The conditional update matched nothing: work out why.
+    booking = await gate_cache.refresh(booking_oid)
+    if not booking or not booking.get("is_group", False):
+        raise HTTPException(status_code=404, detail="Invalid or non-group booking")
+
+    if current_user.role == "staff":
+        _check_staff_zone(current_user, booking.get("zone_id"))
 
     if booking["status"] != "active":
         raise HTTPException(status_code=400, detail=f"Booking is {booking['status']}")
 
     group_members = booking.get("group_members", [])
-    if member_index >= len(group_members):
+    if member_index < 0 or member_index >= len(group_members):
         raise HTTPException(status_code=400, detail="Invalid member index")
     if group_members[member_index]["entry_status"]:
         raise HTTPException(status_code=400, detail="Member already entered")
+    raise HTTPException(status_code=409, detail="Booking changed during validation, please retry")
+
+
+def _scan_result(index: int, scan: ScanEntry, result: str, message: str) -> Dict:
+    return {
+        "index": index,
+        "qr_code": scan.qr_code,
+        "member_index": scan.member_index,
+        "result": result,
+        "message": message,
+    }
+
+
+async def validate_batch_controller(scans: List[ScanEntry], current_user: UserInDB) -> Dict:
+    """
+    Apply a batch of queued scans (e.g. from a scanner that was offline).
+
+    All bookings are fetched with one `$in` query and all entries are
+    written with one unordered bulk_write. Scans are applied in scanned_at
+    order, so when the same ticket was scanned more than once the earliest
+    scan wins and later ones are reported as duplicates. A group scan
+    without member_index admits the next member who has not entered yet.
+    """
+    if current_user.role not in ["staff", "admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if len(scans) > MAX_BATCH_SCANS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_BATCH_SCANS} scans per batch"
+        )
+
+    staff_zone = None
+    if current_user.role == "staff":
+        staff_zone = getattr(current_user, "zone_id", None)
+        if not staff_zone:
+            raise HTTPException(status_code=400, detail="Staff zone not assigned")
+
+    results: List[Optional[Dict]] = [None] * len(scans)
+    resolved: List[Tuple[int, ScanEntry, ObjectId]] = []
+    for index, scan in enumerate(scans):
+        try:
+            booking_id, claims = _parse_qr_code(scan.qr_code)
+        except InvalidQRToken:
+            results[index] = _scan_result(index, scan, "invalid", "Invalid QR code")
+            continue
+        if claims:
+            if staff_zone and str(staff_zone) != str(claims.zone_id):
+                results[index] = _scan_result(
+                    index, scan, "rejected", "Booking does not belong to your zone"
+                )
+                continue
+            reason = validity_error(claims, now=scan.scanned_at)
+            if reason:
+                results[index] = _scan_result(index, scan, "rejected", reason)
+                continue
+        resolved.append((index, scan, booking_id))
+
+    booking_ids = list({booking_id for _, _, booking_id in resolved})
+    bookings = {}
+    if booking_ids:
+        docs = await db["bookings"].find(
+            {"_id": {"$in": booking_ids}},
+            {"status": 1, "zone_id": 1, "pass_id": 1, "is_group": 1, "group_members": 1},
+        ).to_list(None)
+        bookings = {doc["_id"]: doc for doc in docs}
+
+    batch_id = ObjectId()
+    operations = []
+    used_in_batch = set()
+    accepted: List[Tuple[int, ObjectId, Optional[int], bool]] = []
+    for index, scan, booking_id in sorted(resolved, key=lambda item: item[1].scanned_at):
+        booking = bookings.get(booking_id)
+        if not booking:
+            results[index] = _scan_result(index, scan, "invalid", "Invalid QR code")
+            continue
+        if staff_zone and str(staff_zone) != str(booking.get("zone_id")):
+            results[index] = _scan_result(
+                index, scan, "rejected", "Booking does not belong to your zone"
+            )
+            continue
+
+        if booking["status"] != "active":
+            if booking_id in used_in_batch:
+                results[index] = _scan_result(index, scan, "duplicate", "Already entered")
+            else:
+                results[index] = _scan_result(
+                    index, scan, "rejected", f"Pass is {booking['status']}"
+                )
+            continue
 
-    update_path = f"group_members.{member_index}.entry_status"
-    await db["bookings"].update_one({"_id": ObjectId(booking_id)}, {"$set": {update_path: True}})
-    group_members[member_index]["entry_status"] = True
+        if not booking.get("is_group", False):
+            booking["status"] = BookingStatus.USED.value
+            used_in_batch.add(booking_id)
+            operations.append(
+                UpdateOne(
+                    {"_id": booking_id, "status": "active"},
+                    {
+                        "$set": {
+                            "status": BookingStatus.USED.value,
+                            "used_at": scan.scanned_at,
+                            "entry_batch_id": batch_id,
+                        }
+                    },
+                )
+            )
+            accepted.append((index, booking_id, None, True))
+            results[index] = _scan_result(index, scan, "accepted", "Entry validated successfully")
+            continue
 
-    all_entered = all(m["entry_status"] for m in group_members)
-    if all_entered:
-        await db["bookings"].update_one({"_id": ObjectId(booking_id)}, {"$set": {"status": BookingStatus.USED}})
+        members = booking.get("group_members") or []
+        member_index = scan.member_index
+        if member_index is None:
+            member_index = next(
+                (i for i, m in enumerate(members) if not m.get("entry_status")), None
+            )
+            if member_index is None:
+                results[index] = _scan_result(
+                    index, scan, "duplicate", "All group members already entered"
+                )
+                continue
+        if member_index < 0 or member_index >= len(members):
+            results[index] = _scan_result(index, scan, "invalid", "Invalid member index")
+            continue
+        if members[member_index].get("entry_status"):
+            results[index] = _scan_result(index, scan, "duplicate", "Member already entered")
+            continue
+
+        members[member_index]["entry_status"] = True
+        all_entered = all(m.get("entry_status") for m in members)
+        if all_entered:
+            booking["status"] = BookingStatus.USED.value
+            used_in_batch.add(booking_id)
+        operations.append(
+            UpdateOne(
+                _member_entry_filter(booking_id, member_index),
+                _member_entry_update(
+                    member_index, {"entry_batch_id": batch_id}, used_at=scan.scanned_at
+                ),
+            )
+        )
+        accepted.append((index, booking_id, member_index, all_entered))
+        results[index] = _scan_result(
+            index, scan, "accepted", "Member entry validated successfully"
+        )
+
+    if operations:
+        write_result = await db["bookings"].bulk_write(operations, ordered=False)
+        if write_result.matched_count < len(operations):
+            await _mark_batch_conflicts(batch_id, accepted, scans, results)
+
+    admitted = []
+    for index, booking_id, member_index, marks_used in accepted:
+        if results[index]["result"] != "accepted":
+            continue
+        if member_index is not None:
+            gate_cache.update(booking_id, {f"group_members.{member_index}.entry_status": True})
+        if marks_used:
+            gate_cache.update(booking_id, {"status": BookingStatus.USED.value})
+            booking = bookings[booking_id]
+            admitted.append((booking.get("zone_id"), booking.get("pass_id"), {"attendance": 1}))
+    await record_events(admitted)
 
     return {
-        "success": True,
-        "message": "Member entry validated successfully",
-        "all_entered": all_entered
+        "accepted": sum(1 for r in results if r["result"] == "accepted"),
+        "results": results,
     }
+
+
+async def _mark_batch_conflicts(
+    batch_id: ObjectId,
+    accepted: List[Tuple[int, ObjectId, Optional[int], bool]],
+    scans: List[ScanEntry],
+    results: List[Dict],
+):
+    """
+    Some entries were already applied by another gate between our read and
+    our write. Re-read the affected bookings and downgrade every accepted
+    scan whose write did not carry this batch's id.
+    """
+    booking_ids = list({booking_id for _, booking_id, _, _ in accepted})
+    docs = await db["bookings"].find(
+        {"_id": {"$in": booking_ids}},
+        {"entry_batch_id": 1, "group_members.entry_batch_id": 1},
+    ).to_list(None)
+    current = {doc["_id"]: doc for doc in docs}
+
+    for index, booking_id, member_index, _ in accepted:
+        doc = current.get(booking_id, {})
+        if member_index is None:
+            applied = doc.get("entry_batch_id") == batch_id
+        else:
+            members = doc.get("group_members") or []
+            applied = (
+                member_index < len(members)
+                and members[member_index].get("entry_batch_id") == batch_id
+            )
+        if not applied:
+            results[index] = _scan_result(
+                index, scans[index], "conflict", "Already validated at another gate"
+            )
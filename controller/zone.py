@@ -1,10 +1,11 @@
 from fastapi import HTTPException, status
 from fastapi.responses import JSONResponse
-from typing import Dict
+import asyncio
+from typing import Dict, List
 from bson import ObjectId
 from datetime import datetime
 from utils.mongodb import db
-from utils.serializers import serialize_doc, serialize_list
+from utils.serializers import serialize_doc
 from models.zone import ZoneCreate, ZoneUpdate
 from models.user import UserInDB
 
@@ -143,55 +144,109 @@ async def activate_zone_controller(
     return {"message": "Zone activated successfully"}
 
 
+def _bookings_facet() -> Dict:
+    return {
+        "$facet": {
+            "total": [{"$count": "n"}],
+            "active": [{"$match": {"status": "active"}}, {"$count": "n"}],
+            "revenue": [{"$group": {"_id": None, "sum": {"$sum": "$amount_paid"}}}],
+        }
+    }
+
+
+def _facet_value(facet: Dict, name: str, field: str) -> float:
+    rows = facet.get(name) or []
+    return rows[0][field] if rows else 0
+
+
+def _zone_stats(zone: Dict, passes: Dict, bookings: Dict, total_staff: int) -> Dict:
+    return {
+        "zone_id": str(zone["_id"]),
+        "zone_name": zone["name"],
+        "total_passes": passes.get("total", 0),
+        "active_passes": passes.get("active", 0),
+        "total_bookings": bookings.get("total", 0),
+        "active_bookings": bookings.get("active", 0),
+        "total_staff": total_staff,
+        "total_revenue": bookings.get("revenue", 0),
+    }
+
+
+_PASS_COUNTS = {
+    "total": {"$sum": 1},
+    "active": {"$sum": {"$cond": [{"$eq": ["$is_active", True]}, 1, 0]}},
+}
+
+
 async def get_zone_stats_controller(zone_id: str) -> dict:
     """Get statistics for a specific zone"""
     try:
-        zone = await db.zones.find_one({"_id": ObjectId(zone_id)})
+        zone_oid = ObjectId(zone_id)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid zone ID format"
         )
-    
+
+    # The four reads are independent, so they share one round trip of latency.
+    zone, pass_counts, booking_facet, total_staff = await asyncio.gather(
+        db.zones.find_one({"_id": zone_oid}, {"name": 1}),
+        db.passes.aggregate([
+            {"$match": {"zone_id": zone_id}},
+            {"$group": {"_id": None, **_PASS_COUNTS}},
+        ]).to_list(1),
+        db.bookings.aggregate([
+            {"$match": {"zone_id": zone_id}},
+            _bookings_facet(),
+        ]).to_list(1),
+        db.users.count_documents({"zone_id": zone_id, "role": "staff"}),
+    )
+
     if not zone:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Zone not found"
         )
 
-    total_passes = await db.passes.count_documents({"zone_id": zone_id})
-    active_passes = await db.passes.count_documents({
-        "zone_id": zone_id,
-        "is_active": True
-    })
-    
-    total_bookings = await db.bookings.count_documents({"zone_id": zone_id})
-    active_bookings = await db.bookings.count_documents({
-        "zone_id": zone_id,
-        "status": "active"
-    })
-    
-    total_staff = await db.users.count_documents({
-        "zone_id": zone_id,
-        "role": "staff"
-    })
-
-    pipeline = [
-        {"$match": {"zone_id": zone_id}},
-        {"$group": {
-            "_id": None,
-            "total_revenue": {"$sum": "$amount_paid"}
-        }}
+    facet = booking_facet[0] if booking_facet else {}
+    bookings = {
+        "total": _facet_value(facet, "total", "n"),
+        "active": _facet_value(facet, "active", "n"),
+        "revenue": _facet_value(facet, "revenue", "sum"),
+    }
+    return _zone_stats(zone, pass_counts[0] if pass_counts else {}, bookings, total_staff)
+
+
+async def get_all_zone_stats_controller() -> List[dict]:
+    """Statistics for every zone from four grouped queries, run concurrently."""
+    zones, pass_counts, booking_counts, staff_counts = await asyncio.gather(
+        db.zones.find({}, {"name": 1}).to_list(None),
+        db.passes.aggregate([
+            {"$group": {"_id": "$zone_id", **_PASS_COUNTS}},
+        ]).to_list(None),
+        db.bookings.aggregate([
+            {"$group": {
+                "_id": "$zone_id",
+                "total": {"$sum": 1},
+                "active": {"$sum": {"$cond": [{"$eq": ["$status", "active"]}, 1, 0]}},
+                "revenue": {"$sum": "$amount_paid"},
+            }},
+        ]).to_list(None),
+        db.users.aggregate([
+            {"$match": {"role": "staff"}},
+            {"$group": {"_id": "$zone_id", "n": {"$sum": 1}}},
+        ]).to_list(None),
+    )
+
+    passes = {row["_id"]: row for row in pass_counts}
+    bookings = {row["_id"]: row for row in booking_counts}
+    staff = {row["_id"]: row["n"] for row in staff_counts}
+    return [
+        _zone_stats(
+            zone,
+            passes.get(str(zone["_id"]), {}),
+            bookings.get(str(zone["_id"]), {}),
+            staff.get(str(zone["_id"]), 0),
+        )
+        for zone in zones
     ]
-    revenue_data = await db.bookings.aggregate(pipeline).to_list(None)
-    
-    return {
-        "zone_id": str(zone["_id"]),
-        "zone_name": zone["name"],
-        "total_passes": total_passes,
-        "active_passes": active_passes,
-        "total_bookings": total_bookings,
-        "active_bookings": active_bookings,
-        "total_staff": total_staff,
-        "total_revenue": revenue_data[0]["total_revenue"] if revenue_data else 0
-    }
\ No newline at end of file
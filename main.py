@@ -1,23 +1,110 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from router import auth, passes, booking, staff_sale, admin, validation, zone
-from contextlib import asynccontextmanager
+from router import auth, passes, booking, staff_sale, admin, validation, zone, health
+from contextlib import asynccontextmanager, suppress
+from utils.config import settings
+from utils.inventory import hot_passes
+from utils.holds import run_hold_sweeper
+from utils.indexes import apply_indexes
+from utils.lifecycle import lifecycle, logger, drain_on_sigterm, InFlightMiddleware
+from utils.mongodb import warm_pool, close as close_mongo
+from utils.qr_service import qr_renderer
+from utils.gate_cache import gate_cache
+from utils.cache_bus import cache_bus
+from utils.hashing import hash_pool
+from utils.otp_service import otp_backend
+from utils.payment_service import payment_service
+from utils.responses import MongoJSONResponse
+import asyncio
+
+
+WARMUP_RETRY_SECONDS = 5
+
+
+async def warm_up():
+    """
+    Open database connections and fork worker processes before the readiness
+    probe passes, so a new pod does not take traffic cold. Readiness only
+    passes once warmup has succeeded; failures are retried.
+    """
+    while not lifecycle.stopping:
+        try:
+            await asyncio.gather(warm_pool(), qr_renderer.pool.warm(), hash_pool.warm())
+        except Exception as e:
+            logger.warning("Warmup failed, retrying in %ss: %s", WARMUP_RETRY_SECONDS, e)
+            await lifecycle.sleep(WARMUP_RETRY_SECONDS)
+            continue
+        if not lifecycle.draining:
+            lifecycle.ready = True
+            logger.info("Ready")
+        return
 
 
 @asynccontextmanager
-async def startup_event():
+async def lifespan(app: FastAPI):
+    print("Starting up...")
+    # Raises, and so aborts startup, if a unique index cannot be built.
+    await apply_indexes()
+    await cache_bus.prepare()
+    qr_renderer.pool.start()
+    hash_pool.start()
+    drains_on_sigterm = drain_on_sigterm(
+        settings.DRAIN_DELAY_SECONDS, settings.DRAIN_TIMEOUT_SECONDS
+    )
+    # Loops that write are stopped between iterations on shutdown; loops
+    # that only follow a stream are cancelled.
+    background_tasks = [
+        asyncio.create_task(warm_up()),
+        asyncio.create_task(hot_passes.run()),
+        asyncio.create_task(run_hold_sweeper()),
+    ]
+    follower_tasks = [
+        asyncio.create_task(gate_cache.run()),
+        asyncio.create_task(cache_bus.run()),
+    ]
     try:
-        print("Starting up...")
-    except Exception as e:
-        print("Error: ", e)
+        yield
+    finally:
+        # Requests were normally drained by the SIGTERM handler before the
+        # server stopped serving. If that handler could not be installed,
+        # wait for whatever is still in flight here.
+        if not drains_on_sigterm and not await lifecycle.drain(
+            settings.DRAIN_TIMEOUT_SECONDS
+        ):
+            logger.warning(
+                "%s requests still running after drain timeout", lifecycle.in_flight
+            )
+        logger.info("Shutting down background tasks")
+        lifecycle.stop()
+        _, pending = await asyncio.wait(
+            background_tasks, timeout=settings.DRAIN_TIMEOUT_SECONDS
+        )
+        for task in [*pending, *follower_tasks]:
+            task.cancel()
+        for task in [*pending, *follower_tasks]:
+            with suppress(asyncio.CancelledError):
+                await task
+
+        try:
+            await hot_passes.release_all()
+        except Exception as e:
+            print("Error returning hot pass seats: ", e)
+        qr_renderer.pool.shutdown()
+        hash_pool.shutdown()
+        await otp_backend.close()
+        await payment_service.close()
+        close_mongo()
 
 
 app = FastAPI(
     title="Pass Management API",
     description="API for managing event passes and bookings",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=MongoJSONResponse,
 )
 
+app.add_middleware(InFlightMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -33,6 +120,7 @@ app.include_router(passes.router, prefix="/passes", tags=["Passes"])
 app.include_router(booking.router, prefix="/bookings", tags=["Bookings"])
 app.include_router(staff_sale.router, prefix="/staff", tags=["Staff"])
 app.include_router(validation.router, prefix="/validate", tags=["Validation"])
+app.include_router(health.router, prefix="/health", tags=["Health"])
 
 
 async def root():
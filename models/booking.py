@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 
 class PaymentStatus(str, Enum):
@@ -10,9 +10,11 @@ class PaymentStatus(str, Enum):
     FAILED = "failed"
 
 class BookingStatus(str, Enum):
+    PENDING_PAYMENT = "pending_payment"
     ACTIVE = "active"
     USED = "used"
     CANCELLED = "cancelled"
+    EXPIRED = "expired"
 
 class RefundStatus(str, Enum):
     NONE = "none"
@@ -29,12 +31,17 @@ class GroupMember(BaseModel):
 class BookingCreate(BaseModel):
     group_members: Optional[List[GroupMember]] = None
 
+class BulkBookingCreate(BaseModel):
+    pass_id: str
+    bookings: List[BookingCreate]
+
 class BookingInDB(BaseModel):
     id: str = Field(..., alias="_id")
     user_id: str
     pass_id: str
     zone_id: str
-    qr_code: str
+    qr_payload: Optional[str] = None
+    qr_code: Optional[str] = None
     group_qr_codes: Optional[List[str]] = None
     is_group: bool = False
     group_members: Optional[List[GroupMember]] = None
@@ -54,7 +61,8 @@ class BookingUpdate(BaseModel):
 
 class Booking(BaseModel):
     id: str = Field(..., alias="_id")
-    qr_code: str
+    qr_payload: Optional[str] = None
+    qr_code: Optional[str] = None
     is_group: bool
     amount_paid: float
     discount_applied: Optional[float] = None
@@ -63,8 +71,28 @@ class Booking(BaseModel):
     created_at: datetime
     group_members: Optional[List[GroupMember]] = None
 
+class BookingPage(BaseModel):
+    items: List[Booking]
+    next_after: Optional[str] = None
+    total: Optional[int] = None
+
 class QRValidationResponse(BaseModel):
     valid: bool
     booking_id: Optional[str] = None
     message: Optional[str] = None
     group_members_status: Optional[List[GroupMember]] = None
+
+class ScanEntry(BaseModel):
+    qr_code: str
+    scanned_at: datetime
+    member_index: Optional[int] = None
+
+    @validator("scanned_at")
+    def scanned_at_naive_utc(cls, v: datetime) -> datetime:
+        # Scanners send "Z" or an offset; everything else here is naive UTC.
+        if v.tzinfo is not None:
+            v = v.astimezone(timezone.utc).replace(tzinfo=None)
+        return v
+
+class BatchValidationRequest(BaseModel):
+    scans: List[ScanEntry]
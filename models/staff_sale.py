@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from enum import Enum
 from .passes import PassType
@@ -23,8 +23,19 @@ class StaffSaleInDB(StaffSaleBase):
     sale_time: datetime = Field(default_factory=datetime.utcnow)
     commission: Optional[float] = None
     booking_type: Optional[PassType] = None
+    amount: float = 0
+    pass_type: Optional[PassType] = None
+    staff_name: Optional[str] = None
 
 class StaffSale(StaffSaleBase):
     id: str = Field(..., alias="_id")
     sale_time: datetime
     commission: Optional[float]
+    amount: float = 0
+    pass_type: Optional[PassType] = None
+    staff_name: Optional[str] = None
+
+class StaffSalePage(BaseModel):
+    items: List[StaffSale]
+    next_after: Optional[str] = None
+    total: Optional[int] = None
@@ -43,6 +43,29 @@ class User(UserBase):
     id: str = Field(..., alias="_id")
     role: UserRole
 
+class Principal(BaseModel):
+    """
+    Slim view of the authenticated user returned by the auth dependencies.
+    Supports item access (`current_user["_id"]`) as well as attributes so
+    controllers written against the raw user document keep working.
+    """
+    id: str = Field(..., alias="_id")
+    role: UserRole
+    zone_id: Optional[str] = None
+    name: Optional[str] = None
+    email: Optional[str] = None
+
+    def __getitem__(self, key: str):
+        if key == "_id":
+            return self.id
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except AttributeError:
+            return default
+
 class UserLogin(BaseModel):
     email: str 
     password: str
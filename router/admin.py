@@ -1,12 +1,13 @@
-from fastapi import APIRouter, status, Request, HTTPException, Depends
+from fastapi import APIRouter, status, Request, HTTPException, Depends, Query
 from typing import List, Optional
 from datetime import datetime
 
-from models.user import UserInDB
+from models.user import User, UserInDB
 from models.zone import Zone
-from models.booking import Booking
+from models.booking import Booking, BookingPage
 from models.discount import Discount, DiscountCreate
 from utils.security import check_admin_user
+from utils.pagination import DEFAULT_PAGE_SIZE
 from controller.admin import (
     list_users_controller,
     list_staffs_controller,
@@ -17,18 +18,20 @@ from controller.admin import (
     get_discounts_controller,
     get_group_bookings_controller,
     get_all_bookings_controller,
+    export_bookings_controller,
+    export_staff_sales_controller,
 )
 
 router = APIRouter()
 
 
 # Users
-@router.get("/users", response_model=List[UserInDB])
+@router.get("/users", response_model=List[User])
 async def list_users(
     current_user: UserInDB = Depends(check_admin_user), skip: int = 0, limit: int = 100
 ):
     try:
-        return await list_users_controller(skip, limit, current_user)
+        return await list_users_controller(skip, limit)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -39,12 +42,12 @@ async def list_users(
         )
 
 
-@router.get("/staffs", response_model=List[UserInDB])
+@router.get("/staffs", response_model=List[User])
 async def list_staffs(
     current_user: UserInDB = Depends(check_admin_user), skip: int = 0, limit: int = 100
 ):
     try:
-        return await list_staffs_controller(skip, limit, current_user)
+        return await list_staffs_controller(skip, limit)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -92,10 +95,13 @@ async def get_staff_sales_report(
 # Stats
 @router.get("/stats")
 async def get_stats(
-    current_user: UserInDB = Depends(check_admin_user), period: str = "today"
+    current_user: UserInDB = Depends(check_admin_user),
+    period: str = "today",
+    zone_id: Optional[str] = None,
+    pass_id: Optional[str] = None,
 ):
     try:
-        return await get_stats_controller(period)
+        return await get_stats_controller(period, zone_id, pass_id)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -140,12 +146,16 @@ async def get_discounts(
 
 
 # Bookings
-@router.get("/group-bookings")
+@router.get("/group-bookings", response_model=BookingPage)
 async def get_group_bookings(
-    current_user: UserInDB = Depends(check_admin_user), status: Optional[str] = None
+    current_user: UserInDB = Depends(check_admin_user),
+    status: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_total: bool = False,
 ):
     try:
-        return await get_group_bookings_controller(status)
+        return await get_group_bookings_controller(status, after, limit, include_total)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -156,14 +166,64 @@ async def get_group_bookings(
         )
 
 
-@router.get("/bookings", response_model=List[Booking])
+@router.get("/bookings", response_model=BookingPage)
 async def get_all_bookings(
     current_user: UserInDB = Depends(check_admin_user),
     zone_id: Optional[str] = None,
     status: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_total: bool = False,
+):
+    try:
+        return await get_all_bookings_controller(
+            zone_id, status, after, limit, include_total
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        print(f"Unexpected  error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+
+
+# Exports
+@router.get("/export/bookings")
+async def export_bookings(
+    current_user: UserInDB = Depends(check_admin_user),
+    format: str = "ndjson",
+    zone_id: Optional[str] = None,
+    booking_status: Optional[str] = Query(None, alias="status"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    gzip: bool = False,
+):
+    try:
+        return await export_bookings_controller(
+            format, zone_id, booking_status, start_date, end_date, gzip
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        print(f"Unexpected  error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+
+
+@router.get("/export/staff-sales")
+async def export_staff_sales(
+    current_user: UserInDB = Depends(check_admin_user),
+    format: str = "ndjson",
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    gzip: bool = False,
 ):
     try:
-        return await get_all_bookings_controller(zone_id, status)
+        return await export_staff_sales_controller(format, start_date, end_date, gzip)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -1,27 +1,60 @@
-from fastapi import APIRouter, status, Request, HTTPException, Depends
-from typing import List
-from models.booking import BookingCreate, Booking, BookingUpdate
+from fastapi import APIRouter, status, Request, HTTPException, Depends, Header
+from typing import List, Optional
+from models.booking import (
+    BookingCreate,
+    Booking,
+    BookingPage,
+    BookingUpdate,
+    BulkBookingCreate,
+)
 from models.user import UserInDB
-from utils.security import get_current_user
+from utils.security import get_current_user, get_token_principal
+from utils.pagination import DEFAULT_PAGE_SIZE
 from controller.bookings import (
     create_booking_controller,
+    create_bulk_booking_controller,
     get_booking_controller,
     cancel_booking_controller,
     get_user_bookings_controller,
-    get_user_own_bookings_controller
+    get_user_own_bookings_controller,
+    get_booking_qr_controller,
 )
 
 router = APIRouter()
 
 
+# Declared before POST /{pass_id}, which would otherwise capture "bulk".
+@router.post("/bulk")
+async def create_bulk_booking(
+    bulk_booking: BulkBookingCreate,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: UserInDB = Depends(get_current_user),
+):
+    try:
+        return await create_bulk_booking_controller(
+            bulk_booking, current_user, idempotency_key
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        print(f"Unexpected  error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+
+
 @router.post("/{pass_id}", response_model=Booking)
 async def create_booking(
     pass_id: str,
     booking: BookingCreate,
+    idempotency_key: Optional[str] = Header(None),
     current_user: UserInDB = Depends(get_current_user),
 ):
     try:
-        return await create_booking_controller(pass_id,booking, current_user)
+        return await create_booking_controller(
+            pass_id, booking, current_user, idempotency_key
+        )
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -35,7 +68,7 @@ async def create_booking(
 @router.get("/{booking_id}", response_model=Booking)
 async def get_booking(
     booking_id: str,
-    current_user: UserInDB = Depends(get_current_user),
+    current_user: UserInDB = Depends(get_token_principal),
 ):
     try:
         return await get_booking_controller(booking_id, current_user)
@@ -49,13 +82,34 @@ async def get_booking(
         )
 
 
+@router.get("/{booking_id}/qr.png")
+async def get_booking_qr(
+    booking_id: str,
+    if_none_match: Optional[str] = Header(None),
+    current_user: UserInDB = Depends(get_token_principal),
+):
+    try:
+        return await get_booking_qr_controller(booking_id, current_user, if_none_match)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        print(f"Unexpected  error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+
+
 @router.put("/cancel/{booking_id}", response_model=Booking)
 async def cancel_booking(
     booking_id: str,
+    idempotency_key: Optional[str] = Header(None),
     current_user: UserInDB = Depends(get_current_user),
 ):
     try:
-        return await cancel_booking_controller(booking_id, current_user)
+        return await cancel_booking_controller(
+            booking_id, current_user, idempotency_key
+        )
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -66,13 +120,18 @@ async def cancel_booking(
         )
 
 
-@router.get("/user/{user_id}", response_model=List[Booking])
+@router.get("/user/{user_id}", response_model=BookingPage)
 async def get_user_bookings(
     user_id: str,
-    current_user: UserInDB = Depends(get_current_user),
+    current_user: UserInDB = Depends(get_token_principal),
+    after: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_total: bool = False,
 ):
     try:
-        return await get_user_bookings_controller(user_id, current_user)
+        return await get_user_bookings_controller(
+            user_id, current_user, after, limit, include_total
+        )
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -83,12 +142,17 @@ async def get_user_bookings(
         )
 
 
-@router.get("/user/own", response_model=List[Booking])
+@router.get("/user/own", response_model=BookingPage)
 async def get_user_own_bookings(
-    current_user: UserInDB = Depends(get_current_user),
+    current_user: UserInDB = Depends(get_token_principal),
+    after: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_total: bool = False,
 ):
     try:
-        return await get_user_own_bookings_controller(current_user)
+        return await get_user_own_bookings_controller(
+            current_user, after, limit, include_total
+        )
     except HTTPException as e:
         raise e
     except Exception as e:
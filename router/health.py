@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from controller.health import liveness_controller, readiness_controller
+
+router = APIRouter()
+
+
+@router.get("/live")
+async def liveness():
+    return await liveness_controller()
+
+
+@router.get("/ready")
+async def readiness():
+    return await readiness_controller()
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, status, Request, HTTPException, Depends
+from fastapi import APIRouter, status, Request, HTTPException, Depends, Header
 from typing import List, Optional
 
 from controller.passes import (
@@ -18,9 +18,9 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[Pass])
-async def list_passes():
+async def list_passes(if_none_match: Optional[str] = Header(None)):
     try:
-        return await list_passes_controller()
+        return await list_passes_controller(if_none_match)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -70,7 +70,7 @@ async def create_group_pass(
     zone_id: Optional[str] = None,
 ):
     try:
-        return await create_group_pass_controller(pass_, zone_id, current_user)
+        return await create_group_pass_controller(current_user, pass_, zone_id)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -81,14 +81,14 @@ async def create_group_pass(
         )
 
 
-@router.put("/{pass_id}", response_model=Pass)
+@router.put("/{pass_id}")
 async def update_pass(
     pass_id: str,
     pass_update: PassUpdate,
     current_user: UserInDB = Depends(check_admin_user),
 ):
     try:
-        return await update_pass_controller(pass_id, pass_update, current_user)
+        return await update_pass_controller(pass_id, pass_update)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -102,7 +102,7 @@ async def update_pass(
 @router.delete("/{pass_id}")
 async def delete_pass(pass_id: str, current_user: UserInDB = Depends(check_admin_user)):
     try:
-        return await delete_pass_controller(pass_id, current_user)
+        return await delete_pass_controller(pass_id)
     except HTTPException as e:
         raise e
     except Exception as e:
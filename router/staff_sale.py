@@ -1,9 +1,10 @@
 from fastapi import APIRouter, status, Request, HTTPException, Depends
-from typing import List
+from typing import List, Optional
 
 from models.user import UserInDB
-from models.staff_sale import StaffSale
+from models.staff_sale import StaffSale, StaffSalePage
 from utils.security import get_current_user
+from utils.pagination import DEFAULT_PAGE_SIZE
 from controller.staff import (
     verify_booking_controller,
     get_staff_sales_controller,
@@ -29,10 +30,17 @@ async def verify_booking(
         )
 
 
-@router.get("/sales", response_model=List[StaffSale])
-async def get_staff_sales(current_user: UserInDB = Depends(get_current_user)):
+@router.get("/sales", response_model=StaffSalePage)
+async def get_staff_sales(
+    current_user: UserInDB = Depends(get_current_user),
+    after: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_total: bool = False,
+):
     try:
-        return await get_staff_sales_controller(current_user)
+        return await get_staff_sales_controller(
+            current_user, after, limit, include_total
+        )
     except HTTPException as e:
         raise e
     except Exception as e:
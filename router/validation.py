@@ -1,9 +1,11 @@
 from fastapi import APIRouter, status, Request, HTTPException, Depends
 from models.user import UserInDB
+from models.booking import BatchValidationRequest
 from utils.security import get_current_user
 from controller.validation import (
     validate_qr_controller,
     validate_group_member_entry_controller,
+    validate_batch_controller,
 )
 
 router = APIRouter()
@@ -41,3 +43,20 @@ async def validate_group_entry(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error",
         )
+
+
+@router.post("/batch")
+async def validate_batch(
+    request: BatchValidationRequest,
+    current_user: UserInDB = Depends(get_current_user),
+):
+    try:
+        return await validate_batch_controller(request.scans, current_user)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        print(f"Unexpected  error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
@@ -10,6 +10,7 @@ from controller.zone import (
     deactivate_zone_controller,
     activate_zone_controller,
     get_zone_stats_controller,
+    get_all_zone_stats_controller,
 )
 
 router = APIRouter()
@@ -31,6 +32,21 @@ async def create_zone(
         )
 
 
+# Declared before GET /{zone_id}, which would otherwise capture "stats".
+@router.get("/stats")
+async def get_all_zone_stats(current_admin: UserInDB = Depends(check_admin_user)):
+    try:
+        return await get_all_zone_stats_controller()
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        print(f"Unexpected  error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+
+
 @router.get("/{zone_id}", response_model=Zone)
 async def get_zone(zone_id: str, current_admin: UserInDB = Depends(check_admin_user)):
     try:
@@ -114,7 +130,7 @@ async def get_zone_stats(
     zone_id: str, current_admin: UserInDB = Depends(check_admin_user)
 ):
     try:
-        return await get_zone_stats_controller(zone_id, current_admin)
+        return await get_zone_stats_controller(zone_id)
     except HTTPException as e:
         raise e
     except Exception as e:
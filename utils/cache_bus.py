@@ -0,0 +1,194 @@
+import asyncio
+from datetime import datetime
+from enum import Enum
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+from bson import ObjectId
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+from utils.config import settings
+from utils.mongodb import db
+
+
+class CacheEventKind(str, Enum):
+    PASS = "pass"
+    USER = "user"
+
+
+class CacheEvent(NamedTuple):
+    kind: CacheEventKind
+    # Id of the changed document; None means every entry of this kind.
+    key: Optional[str] = None
+
+
+Handler = Callable[[CacheEvent], Awaitable[None]]
+
+
+class _Subscribers:
+    def __init__(self):
+        self._handlers: Dict[CacheEventKind, List[Handler]] = {}
+
+    def subscribe(self, kind: CacheEventKind, handler: Handler):
+        self._handlers.setdefault(kind, []).append(handler)
+
+    async def _deliver(self, event: CacheEvent):
+        for handler in self._handlers.get(event.kind, []):
+            try:
+                await handler(event)
+            except Exception as e:
+                print(f"Error handling cache event {event}:", e)
+
+    async def _flush_all(self):
+        for kind in list(self._handlers):
+            await self._deliver(CacheEvent(kind))
+
+
+class InMemoryCacheBus(_Subscribers):
+    """
+    Single-process bus for development and tests: events reach this
+    worker's subscribers only.
+    """
+
+    async def publish(self, event: CacheEvent):
+        await self._deliver(event)
+
+    async def prepare(self):
+        pass
+
+    async def run(self):
+        pass
+
+
+class MongoCacheBus(_Subscribers):
+    """
+    Invalidation bus over a capped collection, so every worker in every pod
+    evicts its copies when one of them writes, with no broker beyond Mongo.
+
+    `publish` evicts locally at once, then appends the event. Each worker
+    follows the collection with a tailable cursor and applies events from
+    other workers as they land. Unlike a change stream this also works
+    against a standalone mongod. A reopened tail resumes after the last
+    event it read; if that event has already been overwritten, every
+    subscriber is told to drop everything. The caches' own TTLs bound
+    staleness while the tail is down.
+
+    `prepare()` must run before anything publishes (i.e. in the lifespan),
+    since inserting first would create the collection uncapped.
+    """
+
+    RETRY_SECONDS = 5
+
+    def __init__(self, collection: str, size_bytes: int):
+        super().__init__()
+        self.collection = collection
+        self.size_bytes = size_bytes
+        self.origin = str(ObjectId())
+
+    async def publish(self, event: CacheEvent):
+        await self._deliver(event)
+        try:
+            await db[self.collection].insert_one(
+                {
+                    "kind": event.kind.value,
+                    "key": event.key,
+                    "origin": self.origin,
+                    "at": datetime.utcnow(),
+                }
+            )
+        except PyMongoError as e:
+            print(f"Error publishing cache event {event}:", e)
+
+    async def prepare(self):
+        """Create the capped event collection, or check the existing one is capped."""
+        try:
+            await db.create_collection(
+                self.collection, capped=True, size=self.size_bytes
+            )
+        except CollectionInvalid:
+            pass
+        options = await db[self.collection].options()
+        if not options.get("capped"):
+            raise RuntimeError(
+                f"{self.collection} exists but is not capped; drop it so the "
+                "cache bus can recreate it"
+            )
+
+    def _on_event(self, doc: Dict) -> Optional[CacheEvent]:
+        if doc.get("origin") == self.origin:
+            return None
+        try:
+            return CacheEvent(CacheEventKind(doc["kind"]), doc.get("key"))
+        except (KeyError, ValueError):
+            return None
+
+    async def _apply(self, doc: Dict):
+        try:
+            event = self._on_event(doc)
+            if event:
+                await self._deliver(event)
+        except Exception as e:
+            print(f"Error applying cache event {doc.get('_id')}:", e)
+
+    async def run(self):
+        """Background loop tailing the event collection."""
+        # _id of the last event this worker has read. On first start the
+        # tail begins after the newest event; after that it resumes from
+        # here, so nothing published while the tail was closed is skipped.
+        # Events are matched by _id and skipped in insertion ($natural)
+        # order rather than filtered with $gt: ObjectIds come from each
+        # publisher's clock, so they are not ordered across pods.
+        last_seen: Optional[ObjectId] = None
+        started = False
+        failed = False
+        while True:
+            try:
+                collection = db[self.collection]
+                if not started:
+                    newest = await collection.find_one({}, sort=[("$natural", -1)])
+                    last_seen = newest["_id"] if newest else None
+                    started = True
+                    if failed:
+                        # Caches filled while the tail could not start may
+                        # have missed events published meanwhile.
+                        await self._flush_all()
+
+                skipping = last_seen is not None
+                cursor = collection.find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+                while cursor.alive:
+                    async for doc in cursor:
+                        if skipping:
+                            skipping = doc["_id"] != last_seen
+                            continue
+                        last_seen = doc["_id"]
+                        await self._apply(doc)
+                    if skipping:
+                        break
+                if skipping:
+                    # Read to the end without finding last_seen: it was
+                    # overwritten while the tail was closed, along with
+                    # some of the events after it. Drop everything and
+                    # start again after the newest event.
+                    await cursor.close()
+                    await self._flush_all()
+                    started = False
+                    continue
+                # A tailable cursor on an empty collection dies at once;
+                # reopen it from where it stopped.
+                await asyncio.sleep(1)
+                continue
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                print("Cache bus tail unavailable:", e)
+                failed = True
+            except Exception as e:
+                print("Error in cache bus tail:", e)
+                failed = True
+            await asyncio.sleep(self.RETRY_SECONDS)
+
+def _make_bus():
+    if settings.CACHE_BUS_BACKEND == "memory":
+        return InMemoryCacheBus()
+    return MongoCacheBus("cache_events", settings.CACHE_BUS_SIZE_BYTES)
+
+
+cache_bus = _make_bus()
@@ -0,0 +1,79 @@
+import asyncio
+import hashlib
+import time
+from typing import Optional, Tuple
+from fastapi import Response, status
+from utils.cache import etag_matches
+from utils.cache_bus import CacheEvent, CacheEventKind, cache_bus
+from utils.config import settings
+from utils.mongodb import db
+from utils.responses import dumps
+
+# Clients may keep the catalog but must revalidate; with the ETag that is a
+# bodyless 304 until something changes.
+CATALOG_CACHE_CONTROL = "public, no-cache"
+
+
+class PassCatalog:
+    """
+    In-process copy of the public pass list (GET /passes/), held as the
+    encoded JSON body and its ETag so a hit costs no Mongo round trip and no
+    serialization.
+
+    Pass writes anywhere in the deployment reach `invalidate()` through the
+    cache bus. The copy is also rebuilt once it is PASS_CATALOG_TTL_SECONDS
+    old, since available_quantity changes with every booking.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._body: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        self._built_at = 0.0
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._body is not None and time.monotonic() - self._built_at < self.ttl
+
+    def invalidate(self):
+        self._version += 1
+        self._body = None
+        self._etag = None
+
+    async def _build(self) -> Tuple[bytes, str]:
+        version = self._version
+        passes = await db.passes.find({"is_active": True}).to_list(None)
+        body = dumps(passes)
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+        # A write that landed while we were reading may not be in `passes`;
+        # serve this result once but do not keep it.
+        if version == self._version:
+            self._body, self._etag, self._built_at = body, etag, time.monotonic()
+        return body, etag
+
+    async def get(self) -> Tuple[bytes, str]:
+        """Return the encoded catalog and its ETag, rebuilding at most once at a time."""
+        if self._fresh():
+            return self._body, self._etag
+        async with self._lock:
+            if self._fresh():
+                return self._body, self._etag
+            return await self._build()
+
+    async def response(self, if_none_match: Optional[str] = None) -> Response:
+        body, etag = await self.get()
+        headers = {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+pass_catalog = PassCatalog(ttl=settings.PASS_CATALOG_TTL_SECONDS)
+
+
+async def _on_pass_changed(event: CacheEvent):
+    pass_catalog.invalidate()
+
+
+cache_bus.subscribe(CacheEventKind.PASS, _on_pass_changed)
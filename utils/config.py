@@ -11,6 +11,13 @@ load_dotenv()
 class Settings(BaseSettings):
     MONGODB_URL: str = os.environ.get("MONGODB_URL", "mongodb://localhost:27017")
     DB_NAME: str = os.environ.get("DB_NAME", "navratri_pass_db")
+    MONGO_MAX_POOL_SIZE: int = int(os.environ.get("MONGO_MAX_POOL_SIZE", "100"))
+    MONGO_MIN_POOL_SIZE: int = int(os.environ.get("MONGO_MIN_POOL_SIZE", "10"))
+    MONGO_MAX_IDLE_TIME_MS: int = int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", "300000"))
+    MONGO_CONNECT_TIMEOUT_MS: int = int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+    DRAIN_TIMEOUT_SECONDS: float = float(os.environ.get("DRAIN_TIMEOUT_SECONDS", "25"))
+    DRAIN_DELAY_SECONDS: float = float(os.environ.get("DRAIN_DELAY_SECONDS", "10"))
     BACKEND_CORS_ORIGINS: List = []
     SECRET_KEY: str = os.environ.get("SECRET_KEY", "your-secret-key-here")
     AES_KEY:str =os.environ.get("AES_KEY")
@@ -25,8 +32,41 @@ class Settings(BaseSettings):
     ACCOUNT_SID: str = os.environ.get("ACCOUNT_SID")
     AUTH_TOKEN: str = os.environ.get("AUTH_TOKEN")
     TWILIO_SERVICE_SID: str = os.environ.get("TWILIO_SERVICE_SID")
+    OTP_BACKEND: str = os.environ.get("OTP_BACKEND", "twilio")
+    FAKE_OTP_CODE: str = os.environ.get("FAKE_OTP_CODE", "123456")
+    OTP_HTTP_TIMEOUT_SECONDS: float = float(os.environ.get("OTP_HTTP_TIMEOUT_SECONDS", "5"))
+    OTP_MAX_CONNECTIONS: int = int(os.environ.get("OTP_MAX_CONNECTIONS", "20"))
     RAZORPAY_KEY_ID: str = os.environ.get("RAZORPAY_KEY_ID")
     RAZORPAY_KEY_SECRET: str = os.environ.get("RAZORPAY_KEY_SECRET")
+    RAZORPAY_BASE_URL: str = os.environ.get("RAZORPAY_BASE_URL", "https://api.razorpay.com/v1")
+    RAZORPAY_TIMEOUT_SECONDS: float = float(os.environ.get("RAZORPAY_TIMEOUT_SECONDS", "10"))
+    RAZORPAY_MAX_CONCURRENT_CALLS: int = int(os.environ.get("RAZORPAY_MAX_CONCURRENT_CALLS", "50"))
+    RAZORPAY_BULKHEAD_WAIT_SECONDS: float = float(os.environ.get("RAZORPAY_BULKHEAD_WAIT_SECONDS", "2"))
+    RAZORPAY_BREAKER_FAILURES: int = int(os.environ.get("RAZORPAY_BREAKER_FAILURES", "5"))
+    RAZORPAY_BREAKER_RESET_SECONDS: float = float(os.environ.get("RAZORPAY_BREAKER_RESET_SECONDS", "30"))
+    HOT_PASS_IDS: str = os.environ.get("HOT_PASS_IDS", "")
+    HOT_PASS_BLOCK_SIZE: int = int(os.environ.get("HOT_PASS_BLOCK_SIZE", "50"))
+    HOT_PASS_IDLE_SECONDS: int = int(os.environ.get("HOT_PASS_IDLE_SECONDS", "30"))
+    HOLD_TTL_SECONDS: int = int(os.environ.get("HOLD_TTL_SECONDS", "900"))
+    HOLD_SWEEP_INTERVAL_SECONDS: int = int(os.environ.get("HOLD_SWEEP_INTERVAL_SECONDS", "30"))
+    HOLD_SWEEP_BATCH_SIZE: int = int(os.environ.get("HOLD_SWEEP_BATCH_SIZE", "500"))
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_LOCK_SECONDS: int = int(os.environ.get("IDEMPOTENCY_LOCK_SECONDS", "120"))
+    EXPORT_BATCH_SIZE: int = int(os.environ.get("EXPORT_BATCH_SIZE", "1000"))
+    QR_RENDER_WORKERS: int = int(os.environ.get("QR_RENDER_WORKERS", "0"))
+    QR_RENDER_QUEUE_SIZE: int = int(os.environ.get("QR_RENDER_QUEUE_SIZE", "256"))
+    QR_CACHE_SIZE: int = int(os.environ.get("QR_CACHE_SIZE", "2048"))
+    GATE_CACHE_SIZE: int = int(os.environ.get("GATE_CACHE_SIZE", "200000"))
+    PRINCIPAL_CACHE_SIZE: int = int(os.environ.get("PRINCIPAL_CACHE_SIZE", "10000"))
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.environ.get("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    PASS_CATALOG_TTL_SECONDS: int = int(os.environ.get("PASS_CATALOG_TTL_SECONDS", "5"))
+    CACHE_BUS_BACKEND: str = os.environ.get("CACHE_BUS_BACKEND", "mongo")
+    CACHE_BUS_SIZE_BYTES: int = int(os.environ.get("CACHE_BUS_SIZE_BYTES", "1048576"))
+    HASH_WORKERS: int = int(os.environ.get("HASH_WORKERS", "0"))
+    HASH_QUEUE_SIZE: int = int(os.environ.get("HASH_QUEUE_SIZE", "64"))
+    ARGON2_TIME_COST: int = int(os.environ.get("ARGON2_TIME_COST", "2"))
+    ARGON2_MEMORY_COST: int = int(os.environ.get("ARGON2_MEMORY_COST", "102400"))
+    ARGON2_PARALLELISM: int = int(os.environ.get("ARGON2_PARALLELISM", "8"))
 
     @validator("BACKEND_CORS_ORIGINS", pre=True, allow_reuse=True)
     def assemble_cors_origins(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
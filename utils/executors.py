@@ -0,0 +1,66 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+from fastapi import HTTPException, status
+
+
+class BoundedProcessPool:
+    """
+    Process pool for CPU-bound work that must stay off the event loop.
+
+    At most `max_pending` jobs may be queued or running at once; beyond that
+    `submit` fails fast with 503 so callers see backpressure instead of an
+    ever-growing backlog. Worker processes are forked on `start()` (or the
+    first submit) and torn down by `shutdown()`.
+    """
+
+    def __init__(self, name: str, workers: Optional[int] = None, max_pending: int = 256):
+        self.name = name
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def saturated(self) -> bool:
+        return self._pending >= self.max_pending
+
+    def ensure_capacity(self):
+        if self.saturated:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"{self.name} is overloaded, please retry",
+            )
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    async def warm(self):
+        """Fork every worker now rather than on the first requests that need one."""
+        self.start()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(self._executor, os.getpid) for _ in range(self.workers))
+        )
+
+    async def submit(self, fn: Callable, *args: Any) -> Any:
+        self.ensure_capacity()
+        self.start()
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, fn, *args
+            )
+        finally:
+            self._pending -= 1
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
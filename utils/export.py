@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from utils.config import settings
+from utils.serializers import serialize_doc
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Rows are buffered into chunks of roughly this size before being sent, so
+# the response is not written one tiny frame per document.
+CHUNK_SIZE = 64 * 1024
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+async def _rows(cursor, fmt: str, fields: List[str]) -> AsyncIterator[str]:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        async for doc in cursor:
+            doc = serialize_doc(doc)
+            writer.writerow([_csv_value(doc.get(field)) for field in fields])
+            if buffer.tell() >= CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+        return
+
+    chunk = []
+    size = 0
+    async for doc in cursor:
+        line = json.dumps(serialize_doc(doc)) + "\n"
+        chunk.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+            size = 0
+    yield "".join(chunk)
+
+
+async def _encode(rows: AsyncIterator[str], gzip: bool) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31) if gzip else None
+    async for text in rows:
+        data = text.encode()
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if compressor:
+        yield compressor.flush()
+
+
+def stream_export(
+    collection,
+    query: dict,
+    fields: List[str],
+    name: str,
+    fmt: str = "ndjson",
+    gzip: bool = False,
+    sort: Optional[list] = None,
+) -> StreamingResponse:
+    """
+    Stream every document matching `query` as NDJSON or CSV, optionally
+    gzipped. Documents are read from the cursor in EXPORT_BATCH_SIZE batches
+    and written out as they arrive, so memory stays flat for any export size.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format; use one of {', '.join(EXPORT_FORMATS)}",
+        )
+
+    projection = {field: 1 for field in fields}
+    cursor = collection.find(query, projection).batch_size(settings.EXPORT_BATCH_SIZE)
+    if sort:
+        cursor = cursor.sort(sort)
+
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    media_type = EXPORT_FORMATS[fmt]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        _encode(_rows(cursor, fmt, fields), gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
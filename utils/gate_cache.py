@@ -0,0 +1,191 @@
+import asyncio
+from typing import Dict, List, Optional, Set
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+from utils.cache import LRUCache
+from utils.config import settings
+from utils.mongodb import db
+
+_PROJECTION = {"status": 1, "zone_id": 1, "is_group": 1, "group_members": 1}
+
+
+def _slim_members(members: Optional[List[Dict]]) -> List[Dict]:
+    return [
+        {
+            "name": m.get("name"),
+            "phone": m.get("phone"),
+            "entry_status": m.get("entry_status", False),
+        }
+        for m in members or []
+    ]
+
+
+def _slim(doc: Dict) -> Dict:
+    return {
+        "_id": doc["_id"],
+        "status": doc.get("status"),
+        "zone_id": doc.get("zone_id"),
+        "is_group": doc.get("is_group", False),
+        "group_members": _slim_members(doc.get("group_members")),
+    }
+
+
+class GateCache:
+    """
+    In-memory view of the bookings gate staff validate, preloaded per zone
+    the first time a zone is scanned.
+
+    Entries are kept current from a change stream on `bookings`; while the
+    stream is not running (e.g. a standalone mongod, or after an error) the
+    cache is bypassed entirely and every read goes to Mongo, so it can never
+    serve state older than the stream has delivered. Misses fall back to
+    Mongo and are remembered. Writes still go to Mongo; callers report them
+    back through `update` so the next scan sees the transition immediately.
+    At most GATE_CACHE_SIZE bookings are held; the least recently scanned
+    are evicted and re-read from Mongo if they turn up again.
+    """
+
+    RETRY_SECONDS = 5
+
+    def __init__(self):
+        self._entries = LRUCache(maxsize=settings.GATE_CACHE_SIZE)
+        self._zones: Set[str] = set()
+        self._loading: Set[str] = set()
+        # Stream changes seen while a zone loads. A booking the load has not
+        # reached yet would otherwise miss them; they are replayed once no
+        # load is running.
+        self._buffered: List[Dict] = []
+        # The loop only holds weak references to tasks; keep zone loads
+        # alive until they finish.
+        self._tasks: Set[asyncio.Task] = set()
+        self._live = False
+
+    @property
+    def live(self) -> bool:
+        return self._live
+
+    def clear(self):
+        self._entries.clear()
+        self._zones.clear()
+        self._buffered.clear()
+
+    def peek(self, booking_id: ObjectId) -> Optional[Dict]:
+        """Return the cached entry without ever touching Mongo."""
+        if not self._live:
+            return None
+        return self._entries.get(booking_id)
+
+    async def get(self, booking_id: ObjectId) -> Optional[Dict]:
+        entry = self.peek(booking_id)
+        if entry is not None:
+            return entry
+        return await self.refresh(booking_id)
+
+    async def refresh(self, booking_id: ObjectId) -> Optional[Dict]:
+        """Re-read a booking from Mongo, replacing any cached entry."""
+        doc = await db["bookings"].find_one({"_id": booking_id}, _PROJECTION)
+        if not doc:
+            self._entries.pop(booking_id)
+            return None
+        entry = _slim(doc)
+        if self._live:
+            self._entries.set(booking_id, entry)
+        return entry
+
+    def warm_zone(self, zone_id: Optional[str]):
+        """Start preloading a zone's active bookings in the background."""
+        if not self._live or not zone_id:
+            return
+        zone_id = str(zone_id)
+        if zone_id in self._zones or zone_id in self._loading:
+            return
+        self._loading.add(zone_id)
+        task = asyncio.create_task(self._load_zone(zone_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load_zone(self, zone_id: str):
+        try:
+            cursor = db["bookings"].find(
+                {"zone_id": zone_id, "status": "active"}, _PROJECTION
+            ).batch_size(1000)
+            async for doc in cursor:
+                if self._entries.get(doc["_id"]) is None:
+                    self._entries.set(doc["_id"], _slim(doc))
+            if self._live:
+                self._zones.add(zone_id)
+        except Exception as e:
+            print(f"Error preloading gate cache for zone {zone_id}:", e)
+        finally:
+            self._loading.discard(zone_id)
+            if not self._loading:
+                buffered, self._buffered = self._buffered, []
+                for change in buffered:
+                    self._apply_change(change)
+
+    def update(self, booking_id: ObjectId, fields: Dict):
+        """
+        Apply `$set`-style fields (including `group_members.N.entry_status`
+        paths) to a cached entry.
+        """
+        entry = self._entries.get(booking_id)
+        if entry is None:
+            return
+        for path, value in fields.items():
+            if path == "group_members":
+                entry["group_members"] = _slim_members(value)
+            elif path.startswith("group_members."):
+                parts = path.split(".")
+                if len(parts) == 3 and parts[1].isdigit() and parts[2] == "entry_status":
+                    members = entry["group_members"]
+                    index = int(parts[1])
+                    if index < len(members):
+                        members[index]["entry_status"] = value
+            elif path in entry:
+                entry[path] = value
+
+    def _on_change(self, change: Dict):
+        if self._loading:
+            self._buffered.append(change)
+        self._apply_change(change)
+
+    def _apply_change(self, change: Dict):
+        operation = change["operationType"]
+        if operation in ("drop", "rename", "dropDatabase", "invalidate"):
+            self.clear()
+            return
+        booking_id = change["documentKey"]["_id"]
+        if operation == "delete":
+            self._entries.pop(booking_id)
+        elif operation in ("insert", "replace"):
+            doc = change.get("fullDocument")
+            if doc and (
+                self._entries.get(booking_id) is not None
+                or str(doc.get("zone_id")) in self._zones
+            ):
+                self._entries.set(booking_id, _slim(doc))
+        elif operation == "update":
+            self.update(booking_id, change["updateDescription"].get("updatedFields", {}))
+
+    async def run(self):
+        """Background loop following the bookings change stream."""
+        while True:
+            try:
+                async with db["bookings"].watch() as stream:
+                    # Anything cached before this point may have missed
+                    # changes; start from an empty cache.
+                    self.clear()
+                    self._live = True
+                    async for change in stream:
+                        self._on_change(change)
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                print("Gate cache change stream unavailable:", e)
+            finally:
+                self._live = False
+                self.clear()
+            await asyncio.sleep(self.RETRY_SECONDS)
+
+
+gate_cache = GateCache()
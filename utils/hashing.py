@@ -0,0 +1,46 @@
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+from .config import settings
+from .executors import BoundedProcessPool
+
+# Changing any of these makes existing hashes "deprecated"; they are
+# rehashed transparently on the user's next successful login.
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
+
+hash_pool = BoundedProcessPool(
+    "Password hasher",
+    workers=settings.HASH_WORKERS,
+    max_pending=settings.HASH_QUEUE_SIZE,
+)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and, if its hash uses outdated parameters, return a
+    fresh hash to store. Returns (valid, new_hash_or_None).
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    return await hash_pool.submit(get_password_hash, password)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    return await hash_pool.submit(verify_and_update, plain_password, hashed_password)
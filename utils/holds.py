@@ -0,0 +1,144 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from utils.config import settings
+from utils.mongodb import db
+from utils.lifecycle import lifecycle
+from models.booking import BookingStatus
+
+# Mongo's TTL monitor only removes holds this long after they expire. The
+# sweeper is what returns seats; the TTL index just guarantees the
+# collection cannot grow without bound if no sweeper is running.
+HOLD_TTL_GRACE_SECONDS = 3600
+
+
+def _hold_doc(booking_id: ObjectId, pass_id: str, quantity: int, now: datetime) -> dict:
+    return {
+        "_id": booking_id,
+        "pass_id": str(pass_id),
+        "quantity": quantity,
+        "created_at": now,
+        "expires_at": now + timedelta(seconds=settings.HOLD_TTL_SECONDS),
+    }
+
+
+async def create_hold(
+    booking_id: ObjectId, pass_id: str, quantity: int, now: Optional[datetime] = None
+):
+    """
+    Record the seats taken by a pending_payment booking. The hold shares the
+    booking's _id and expires after HOLD_TTL_SECONDS.
+    """
+    now = now or datetime.utcnow()
+    await db["holds"].insert_one(_hold_doc(booking_id, pass_id, quantity, now))
+
+
+async def create_holds(
+    pass_id: str, quantities: Dict[ObjectId, int], now: Optional[datetime] = None
+):
+    """Hold seats for several bookings of one pass with a single insert_many."""
+    now = now or datetime.utcnow()
+    await db["holds"].insert_many(
+        [
+            _hold_doc(booking_id, pass_id, quantity, now)
+            for booking_id, quantity in quantities.items()
+        ]
+    )
+
+
+async def cancel_holds(booking_ids: List[ObjectId]):
+    """
+    Undo the holds of bookings whose creation failed after the holds were
+    written. Any of the bookings that did get inserted are expired first so
+    they can no longer be paid for, then the holds are deleted so the sweeper
+    never returns their seats. The caller gives the seats back itself.
+    """
+    await db["bookings"].update_many(
+        {"_id": {"$in": booking_ids}, "status": BookingStatus.PENDING_PAYMENT},
+        {"$set": {"status": BookingStatus.EXPIRED, "expired_at": datetime.utcnow()}},
+    )
+    await db["holds"].delete_many({"_id": {"$in": booking_ids}})
+
+
+async def sweep_expired_holds(now: Optional[datetime] = None) -> int:
+    """
+    Expire bookings whose hold has lapsed while still pending_payment and
+    return their seats to `passes`, one batch at a time.
+
+    Each batch tags the bookings it transitions with a sweep id, so only
+    seats of bookings this sweep actually expired are returned, even when
+    several workers sweep at once. Returns the number of bookings expired.
+    """
+    now = now or datetime.utcnow()
+    batch_size = settings.HOLD_SWEEP_BATCH_SIZE
+    expired_total = 0
+
+    while True:
+        holds = (
+            await db["holds"]
+            .find({"expires_at": {"$lte": now}})
+            .sort("expires_at", 1)
+            .limit(batch_size)
+            .to_list(None)
+        )
+        if not holds:
+            break
+
+        booking_ids = [hold["_id"] for hold in holds]
+        sweep_id = ObjectId()
+        await db["bookings"].update_many(
+            {"_id": {"$in": booking_ids}, "status": BookingStatus.PENDING_PAYMENT},
+            {
+                "$set": {
+                    "status": BookingStatus.EXPIRED,
+                    "expired_at": now,
+                    "expired_by_sweep": sweep_id,
+                }
+            },
+        )
+        expired = await db["bookings"].find(
+            {"_id": {"$in": booking_ids}, "expired_by_sweep": sweep_id},
+            {"_id": 1},
+        ).to_list(None)
+        expired_ids = {booking["_id"] for booking in expired}
+
+        seats = defaultdict(int)
+        for hold in holds:
+            if hold["_id"] in expired_ids:
+                seats[hold["pass_id"]] += hold.get("quantity", 1)
+        if seats:
+            await db["passes"].bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": ObjectId(pass_id)},
+                        {"$inc": {"available_quantity": quantity}},
+                    )
+                    for pass_id, quantity in seats.items()
+                ],
+                ordered=False,
+            )
+
+        await db["holds"].delete_many({"_id": {"$in": booking_ids}})
+        expired_total += len(expired_ids)
+
+        if len(holds) < batch_size:
+            break
+
+    return expired_total
+
+
+async def run_hold_sweeper():
+    """
+    Background loop started from the app lifespan. It stops between sweeps
+    on shutdown, so a batch is never left expired without its seats returned.
+    """
+    while not lifecycle.stopping:
+        try:
+            expired = await sweep_expired_holds()
+            if expired:
+                print(f"Expired {expired} unpaid bookings")
+        except Exception as e:
+            print("Error sweeping expired holds:", e)
+        await lifecycle.sleep(settings.HOLD_SWEEP_INTERVAL_SECONDS)
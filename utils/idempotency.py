@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+from fastapi import HTTPException, status
+from fastapi.responses import Response
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from utils.config import settings
+from utils.mongodb import db
+
+MAX_KEY_LENGTH = 255
+REPLAY_HEADER = "Idempotent-Replayed"
+
+# Requests with the same key that arrive while the first is still running on
+# this worker wait on its future instead of going to the database.
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def _fingerprint(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def _replay(record: dict) -> Response:
+    return Response(
+        content=record["body"],
+        status_code=record["status_code"],
+        media_type=record.get("media_type") or "application/json",
+        headers={REPLAY_HEADER: "true"},
+    )
+
+
+def _check_fingerprint(record: dict, fingerprint: str):
+    if record.get("fingerprint") != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request",
+        )
+
+
+def _still_running():
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still being processed",
+    )
+
+
+async def _claim(record_id: str, fingerprint: str, now: datetime) -> Optional[dict]:
+    """
+    Take the key for this request. Returns None once claimed, or the
+    existing record if another request already owns or completed it. An
+    in-progress claim whose lease has lapsed (its worker died) is taken over.
+    """
+    lease_until = now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+    try:
+        await db["idempotency_keys"].insert_one(
+            {
+                "_id": record_id,
+                "state": "in_progress",
+                "fingerprint": fingerprint,
+                "created_at": now,
+                "expires_at": lease_until,
+            }
+        )
+        return None
+    except DuplicateKeyError:
+        pass
+
+    taken = await db["idempotency_keys"].find_one_and_update(
+        {"_id": record_id, "state": "in_progress", "expires_at": {"$lt": now}},
+        {"$set": {"fingerprint": fingerprint, "expires_at": lease_until}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if taken:
+        return None
+    existing = await db["idempotency_keys"].find_one({"_id": record_id})
+    # Expired and removed between the two calls; treat it as ours.
+    return existing or await _claim(record_id, fingerprint, now)
+
+
+async def run_idempotent(
+    idempotency_key: Optional[str],
+    user_id: str,
+    scope: str,
+    fingerprint: str,
+    operation: Callable[[], Awaitable[Response]],
+) -> Response:
+    """
+    Run `operation` at most once per (user, scope, Idempotency-Key). Its
+    response is stored for IDEMPOTENCY_TTL_SECONDS and replayed to retries,
+    with an Idempotent-Replayed header. Failed attempts are forgotten so the
+    client can retry them. Without a key the operation simply runs.
+    """
+    if not idempotency_key:
+        return await operation()
+    if len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters",
+        )
+
+    record_id = f"{user_id}:{scope}:{idempotency_key}"
+    fingerprint = _fingerprint(fingerprint)
+
+    leader = _inflight.get(record_id)
+    if leader is not None:
+        record = await asyncio.shield(leader)
+        _check_fingerprint(record, fingerprint)
+        return _replay(record)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[record_id] = future
+    try:
+        try:
+            existing = await _claim(record_id, fingerprint, datetime.utcnow())
+        except BaseException as e:
+            _fail(future, e)
+            raise
+        if existing is not None:
+            if existing.get("state") != "completed":
+                _fail(future, _still_running())
+                raise _still_running()
+            future.set_result(existing)
+            _check_fingerprint(existing, fingerprint)
+            return _replay(existing)
+
+        try:
+            response = await operation()
+        except BaseException as e:
+            await _forget(record_id)
+            _fail(future, e)
+            raise
+
+        record = {
+            "state": "completed",
+            "fingerprint": fingerprint,
+            "status_code": response.status_code,
+            "body": bytes(response.body),
+            "media_type": response.media_type,
+            "expires_at": datetime.utcnow()
+            + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+        }
+        future.set_result(record)
+        try:
+            await db["idempotency_keys"].update_one(
+                {"_id": record_id}, {"$set": record}
+            )
+        except Exception as e:
+            # The operation succeeded; failing the request now would invite
+            # the very retry this guards against. The lease keeps the key
+            # reserved until it lapses.
+            print("Error storing idempotent response:", e)
+        return response
+    finally:
+        _inflight.pop(record_id, None)
+
+
+def _fail(future: asyncio.Future, error: BaseException):
+    """Hand the leader's failure to any requests coalesced onto it."""
+    if not isinstance(error, HTTPException):
+        error = HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The original request did not complete; retry with the same key",
+        )
+    future.set_exception(error)
+    # Mark the exception retrieved so an unawaited future does not log it.
+    future.exception()
+
+
+async def _forget(record_id: str):
+    try:
+        await db["idempotency_keys"].delete_one(
+            {"_id": record_id, "state": "in_progress"}
+        )
+    except Exception as e:
+        print("Error releasing idempotency key:", e)
@@ -0,0 +1,158 @@
+"""
+Every index the application relies on, declared in one place and applied
+idempotently from the app lifespan. Compare the declaration with a live
+database, or apply it without starting the app, with:
+
+    python -m utils.indexes diff
+    python -m utils.indexes apply
+"""
+import asyncio
+import sys
+from typing import Dict, List, NamedTuple, Tuple
+from pymongo import ASCENDING, DESCENDING
+from utils.holds import HOLD_TTL_GRACE_SECONDS
+from utils.mongodb import db
+
+
+class IndexSpec(NamedTuple):
+    collection: str
+    keys: List[Tuple[str, int]]
+    options: Dict = {}
+
+
+# Options compared by `diff`; anything else (e.g. name) is informational.
+_COMPARED_OPTIONS = ("unique", "expireAfterSeconds", "partialFilterExpression", "sparse")
+
+INDEXES = [
+    # users: login and registration look up by email and phone; admin
+    # listings and zone stats filter staff by role and zone.
+    IndexSpec("users", [("email", ASCENDING)], {"unique": True}),
+    IndexSpec(
+        "users",
+        [("phone", ASCENDING)],
+        {"unique": True, "partialFilterExpression": {"phone": {"$type": "string"}}},
+    ),
+    IndexSpec("users", [("role", ASCENDING), ("zone_id", ASCENDING)]),
+    # bookings: paginated listings walk _id within each filter; the gate
+    # cache loads active bookings per zone; exports and rebuilds range over
+    # created_at.
+    IndexSpec("bookings", [("user_id", ASCENDING), ("_id", DESCENDING)]),
+    IndexSpec(
+        "bookings",
+        [("zone_id", ASCENDING), ("status", ASCENDING), ("_id", DESCENDING)],
+    ),
+    IndexSpec(
+        "bookings",
+        [("is_group", ASCENDING), ("status", ASCENDING), ("_id", DESCENDING)],
+    ),
+    IndexSpec("bookings", [("status", ASCENDING), ("_id", DESCENDING)]),
+    IndexSpec("bookings", [("created_at", ASCENDING)]),
+    # passes: public listing and zone stats.
+    IndexSpec("passes", [("zone_id", ASCENDING), ("is_active", ASCENDING)]),
+    # discounts: codes are unique; staff and booking lookups match on the
+    # assignee or zone plus the active window.
+    IndexSpec("discounts", [("code", ASCENDING)], {"unique": True}),
+    IndexSpec(
+        "discounts",
+        [("assigned_to", ASCENDING), ("is_active", ASCENDING), ("expiry", ASCENDING)],
+    ),
+    IndexSpec(
+        "discounts",
+        [("zone_id", ASCENDING), ("is_active", ASCENDING), ("expiry", ASCENDING)],
+    ),
+    # staff_sales: per-staff stats and listings, and the sales report's
+    # date range.
+    IndexSpec("staff_sales", [("staff_id", ASCENDING), ("sale_time", ASCENDING)]),
+    IndexSpec("staff_sales", [("staff_id", ASCENDING), ("_id", DESCENDING)]),
+    IndexSpec("staff_sales", [("sale_time", ASCENDING)]),
+    # holds and idempotency_keys expire through TTL indexes.
+    IndexSpec(
+        "holds",
+        [("expires_at", ASCENDING)],
+        {"expireAfterSeconds": HOLD_TTL_GRACE_SECONDS},
+    ),
+    IndexSpec("idempotency_keys", [("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+]
+
+
+async def apply_indexes(indexes: List[IndexSpec] = INDEXES) -> List[str]:
+    """
+    Create every declared index. create_index is a no-op for indexes that
+    already exist, so this is safe on every startup. Failures are logged
+    and returned so one bad secondary index does not keep the app from
+    starting, except for unique indexes: registration and discount codes
+    rely on those to reject duplicates, so if any of them cannot be built
+    (e.g. over duplicate data) a RuntimeError is raised once every index
+    has been tried.
+    """
+    errors = []
+    unique_errors = []
+    for spec in indexes:
+        try:
+            await db[spec.collection].create_index(spec.keys, **spec.options)
+        except Exception as e:
+            message = f"{spec.collection} {spec.keys}: {e}"
+            print("Error creating index", message)
+            errors.append(message)
+            if spec.options.get("unique"):
+                unique_errors.append(message)
+    if unique_errors:
+        raise RuntimeError("Unique indexes missing: " + "; ".join(unique_errors))
+    return errors
+
+
+def _signature(keys, options: Dict) -> Tuple:
+    return (
+        tuple((field, int(direction)) for field, direction in keys),
+        tuple((name, options.get(name)) for name in _COMPARED_OPTIONS),
+    )
+
+
+async def diff_indexes(indexes: List[IndexSpec] = INDEXES) -> Dict[str, Dict[str, list]]:
+    """
+    Compare declared indexes with the live ones, per collection: `missing`
+    are declared but absent (or differ in options), `extra` exist but are
+    not declared.
+    """
+    declared: Dict[str, Dict[Tuple, IndexSpec]] = {}
+    for spec in indexes:
+        declared.setdefault(spec.collection, {})[_signature(spec.keys, spec.options)] = spec
+
+    report = {}
+    for collection, specs in declared.items():
+        live = {}
+        for name, info in (await db[collection].index_information()).items():
+            if name != "_id_":
+                live[_signature(info["key"], info)] = name
+        missing = [spec.keys for sig, spec in specs.items() if sig not in live]
+        extra = [name for sig, name in live.items() if sig not in specs]
+        if missing or extra:
+            report[collection] = {"missing": missing, "extra": extra}
+    return report
+
+
+async def _main(command: str):
+    if command == "apply":
+        try:
+            errors = await apply_indexes()
+        except RuntimeError as e:
+            print(e)
+            return 1
+        print(f"Applied {len(INDEXES) - len(errors)} of {len(INDEXES)} indexes")
+        return 1 if errors else 0
+    report = await diff_indexes()
+    if not report:
+        print("All declared indexes are present")
+        return 0
+    for collection, changes in report.items():
+        for keys in changes["missing"]:
+            print(f"- {collection} {keys} (missing)")
+        for name in changes["extra"]:
+            print(f"+ {collection} {name} (not declared)")
+    return 1
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] not in (["diff"], ["apply"]):
+        raise SystemExit("usage: python -m utils.indexes diff|apply")
+    raise SystemExit(asyncio.run(_main(sys.argv[1])))
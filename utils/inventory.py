@@ -0,0 +1,239 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from utils.config import settings
+from utils.mongodb import db
+from utils.lifecycle import lifecycle
+from utils.cache_bus import CacheEvent, CacheEventKind, cache_bus
+
+
+def _reservable_filter(pass_oid: ObjectId, quantity: int, now: datetime) -> Dict:
+    return {
+        "_id": pass_oid,
+        "is_active": True,
+        "available_quantity": {"$gte": quantity},
+        "$or": [
+            {"validity_end": None},
+            {"validity_end": {"$gte": now}},
+        ],
+    }
+
+
+def _is_reservable(pass_: Dict, now: datetime) -> bool:
+    if not pass_.get("is_active", False):
+        return False
+    validity_end = pass_.get("validity_end")
+    return not (validity_end and now > validity_end)
+
+
+async def _diagnose(pass_oid: ObjectId, quantity: int, now: datetime, held: int = 0) -> int:
+    """
+    Slow path taken only when a conditional reservation matched nothing:
+    re-read the pass and raise the reason. Returns the seats currently left
+    in Mongo if the pass could in fact satisfy the request (a concurrent
+    release happened in between).
+    """
+    pass_ = await db["passes"].find_one({"_id": pass_oid})
+    if not pass_:
+        raise HTTPException(status_code=404, detail="Pass not found")
+    if not pass_.get("is_active", False):
+        raise HTTPException(status_code=400, detail="Pass is inactive")
+    validity_end = pass_.get("validity_end")
+    if validity_end and now > validity_end:
+        raise HTTPException(status_code=400, detail="Pass validity has expired")
+    available_quantity = pass_.get("available_quantity", 0) or 0
+    if available_quantity + held < quantity:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Only {available_quantity + held} passes are available",
+        )
+    return available_quantity
+
+
+async def _take(pass_oid: ObjectId, quantity: int, now: datetime) -> Optional[Dict]:
+    return await db["passes"].find_one_and_update(
+        _reservable_filter(pass_oid, quantity, now),
+        {"$inc": {"available_quantity": -quantity}},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _to_object_id(pass_id: str) -> ObjectId:
+    try:
+        return ObjectId(pass_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pass ID format")
+
+
+class _Block:
+    __slots__ = ("remaining", "pass_doc", "last_used")
+
+    def __init__(self, remaining: int, pass_doc: Dict):
+        self.remaining = remaining
+        self.pass_doc = pass_doc
+        self.last_used = time.monotonic()
+
+
+class HotPassAllocator:
+    """
+    Serves reservations for opted-in "hot" passes from seat blocks claimed
+    from Mongo in chunks, so the busiest pass stops serializing every booking
+    on one document. Seats left in a block go back to the pass when the
+    block sits idle for `idle_seconds` and on shutdown.
+    """
+
+    CLAIM_ATTEMPTS = 3
+
+    def __init__(self, pass_ids: Iterable[str], block_size: int, idle_seconds: int):
+        self.pass_ids = {p.strip() for p in pass_ids if p.strip()}
+        self.block_size = max(1, block_size)
+        self.idle_seconds = idle_seconds
+        self._blocks: Dict[str, _Block] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def is_hot(self, pass_id: str) -> bool:
+        return pass_id in self.pass_ids
+
+    def _lock(self, pass_id: str) -> asyncio.Lock:
+        return self._locks.setdefault(pass_id, asyncio.Lock())
+
+    async def reserve(self, pass_id: str, quantity: int) -> Dict:
+        async with self._lock(pass_id):
+            now = datetime.utcnow()
+            block = self._blocks.get(pass_id)
+            if block and not _is_reservable(block.pass_doc, now):
+                await self._flush(pass_id)
+                block = None
+            if block is None or block.remaining < quantity:
+                block = await self._refill(pass_id, quantity, now)
+            block.remaining -= quantity
+            block.last_used = time.monotonic()
+            return block.pass_doc
+
+    async def _refill(self, pass_id: str, quantity: int, now: datetime) -> _Block:
+        pass_oid = _to_object_id(pass_id)
+        block = self._blocks.get(pass_id)
+        held = block.remaining if block else 0
+        needed = quantity - held
+        size = max(self.block_size, needed)
+
+        for _ in range(self.CLAIM_ATTEMPTS):
+            pass_ = await _take(pass_oid, size, now)
+            if pass_:
+                block = _Block(held + size, pass_)
+                self._blocks[pass_id] = block
+                return block
+            # Fewer seats left than a full block: claim whatever remains.
+            size = await _diagnose(pass_oid, quantity, now, held=held)
+
+        raise HTTPException(
+            status_code=503, detail="Pass inventory is busy, please retry"
+        )
+
+    async def release(self, pass_id: str, quantity: int):
+        async with self._lock(pass_id):
+            block = self._blocks.get(pass_id)
+            if block:
+                block.remaining += quantity
+                return
+        await _return_to_pass(pass_id, quantity)
+
+    async def _flush(self, pass_id: str):
+        block = self._blocks.pop(pass_id, None)
+        if block:
+            await _return_to_pass(pass_id, block.remaining)
+
+    async def flush_idle(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        for pass_id, block in list(self._blocks.items()):
+            if block.last_used < cutoff:
+                async with self._lock(pass_id):
+                    await self._flush(pass_id)
+
+    async def release_all(self):
+        for pass_id in list(self._blocks):
+            async with self._lock(pass_id):
+                await self._flush(pass_id)
+
+    async def forget(self, pass_id: str):
+        """
+        Hand back a pass's block after the pass itself changed, so the next
+        reservation re-reads its price, validity and status.
+        """
+        async with self._lock(pass_id):
+            await self._flush(pass_id)
+
+    async def run(self):
+        """Background loop handing idle blocks back to Mongo."""
+        while await lifecycle.sleep(max(1, self.idle_seconds / 2)):
+            try:
+                await self.flush_idle()
+            except Exception as e:
+                print("Error flushing hot pass blocks:", e)
+
+
+hot_passes = HotPassAllocator(
+    settings.HOT_PASS_IDS.split(","),
+    settings.HOT_PASS_BLOCK_SIZE,
+    settings.HOT_PASS_IDLE_SECONDS,
+)
+
+
+async def _on_pass_changed(event: CacheEvent):
+    if event.key is None:
+        await hot_passes.release_all()
+    elif hot_passes.is_hot(event.key):
+        await hot_passes.forget(event.key)
+
+
+cache_bus.subscribe(CacheEventKind.PASS, _on_pass_changed)
+
+
+async def _return_to_pass(pass_id: str, quantity: int):
+    if quantity <= 0:
+        return
+    await db["passes"].update_one(
+        {"_id": ObjectId(pass_id)},
+        {"$inc": {"available_quantity": quantity}},
+    )
+
+
+async def reserve_seats(pass_id: str, quantity: int) -> Dict:
+    """
+    Atomically take `quantity` seats from a pass.
+
+    The availability, activity and validity checks are part of the update
+    filter, so concurrent bookings can never drive `available_quantity`
+    below zero. Returns the post-decrement pass document. Passes listed in
+    HOT_PASS_IDS are served from this worker's local seat block instead.
+    """
+    if hot_passes.is_hot(pass_id):
+        return await hot_passes.reserve(pass_id, quantity)
+
+    pass_oid = _to_object_id(pass_id)
+    now = datetime.utcnow()
+    pass_ = await _take(pass_oid, quantity, now)
+    if not pass_:
+        await _diagnose(pass_oid, quantity, now)
+        # Seats were released between the two reads; try once more.
+        pass_ = await _take(pass_oid, quantity, now)
+        if not pass_:
+            raise HTTPException(status_code=400, detail="Passes are sold out")
+    return pass_
+
+
+async def release_seats(pass_id: str, quantity: int):
+    """
+    Return seats to a pass, e.g. when a booking is cancelled or a reservation
+    has to be rolled back.
+    """
+    if quantity <= 0:
+        return
+    if hot_passes.is_hot(pass_id):
+        await hot_passes.release(pass_id, quantity)
+        return
+    await _return_to_pass(pass_id, quantity)
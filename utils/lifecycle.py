@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import signal
+
+# uvicorn configures this logger, so lifecycle messages land in the server log.
+logger = logging.getLogger("uvicorn.error")
+
+
+class Lifecycle:
+    """
+    Process-wide readiness and shutdown state.
+
+    `ready` flips once warmup has finished and back off when draining starts,
+    which is what GET /health/ready reports. Background loops sleep through
+    `sleep()` so they stop between iterations instead of being cancelled
+    halfway through a write.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.draining = False
+        self.in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._stopping = asyncio.Event()
+
+    @property
+    def stopping(self) -> bool:
+        return self._stopping.is_set()
+
+    async def sleep(self, seconds: float) -> bool:
+        """Sleep, waking early on shutdown. Returns False once the app is stopping."""
+        try:
+            await asyncio.wait_for(self._stopping.wait(), seconds)
+            return False
+        except asyncio.TimeoutError:
+            return True
+
+    def request_started(self):
+        self.in_flight += 1
+        self._idle.clear()
+
+    def request_finished(self):
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self._idle.set()
+
+    def begin_drain(self):
+        """Stop reporting ready; requests are still served."""
+        self.ready = False
+        self.draining = True
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Stop reporting ready and wait up to `timeout` seconds for in-flight
+        requests (including their post-response background tasks) to finish.
+        Returns whether everything finished in time.
+        """
+        self.begin_drain()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def stop(self):
+        self._stopping.set()
+
+
+lifecycle = Lifecycle()
+_drain_tasks = set()
+
+
+async def _drain_then_exit(previous, signum: int, delay: float, timeout: float):
+    logger.info("SIGTERM received; failing readiness for %ss before shutting down", delay)
+    await asyncio.sleep(delay)
+    if not await lifecycle.drain(timeout):
+        logger.warning("%s requests still running after drain timeout", lifecycle.in_flight)
+    previous(signum, None)
+
+
+def drain_on_sigterm(delay: float, timeout: float) -> bool:
+    """
+    Put a handler in front of the server's SIGTERM handler. uvicorn stops
+    accepting connections as soon as it sees SIGTERM, before the lifespan
+    shutdown runs, so readiness has to fail earlier than that: this handler
+    reports not-ready at once, keeps serving for `delay` seconds so the load
+    balancer stops routing here, waits up to `timeout` seconds for in-flight
+    requests, and only then passes the signal on. A second SIGTERM is passed
+    on immediately. Must be called from the main thread after the server
+    has installed its own handlers (i.e. from the lifespan).
+
+    This relies on uvicorn (0.29+) installing `Server.handle_exit` with
+    signal.signal. Older versions register it with loop.add_signal_handler,
+    which the event loop dispatches itself whatever Python handler is set.
+    Then nothing is installed and False is returned: the caller should
+    drain in its shutdown instead, after the server has stopped accepting
+    connections.
+    """
+    previous = signal.getsignal(signal.SIGTERM)
+    if getattr(previous, "__name__", None) != "handle_exit":
+        logger.warning(
+            "SIGTERM is not handled by uvicorn's handle_exit (%r); "
+            "draining at shutdown instead",
+            previous,
+        )
+        return False
+    loop = asyncio.get_running_loop()
+
+    def start(signum: int):
+        task = loop.create_task(_drain_then_exit(previous, signum, delay, timeout))
+        _drain_tasks.add(task)
+        task.add_done_callback(_drain_tasks.discard)
+
+    def handler(signum, frame):
+        if lifecycle.draining:
+            previous(signum, frame)
+            return
+        lifecycle.begin_drain()
+        loop.call_soon_threadsafe(start, signum)
+
+    signal.signal(signal.SIGTERM, handler)
+    return True
+
+
+class InFlightMiddleware:
+    """Counts HTTP requests in flight so shutdown can wait for them."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/health"):
+            await self.app(scope, receive, send)
+            return
+        lifecycle.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lifecycle.request_finished()
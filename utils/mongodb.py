@@ -1,9 +1,32 @@
+import asyncio
 import motor.motor_asyncio
 
 from .config import settings
-client = motor.motor_asyncio.AsyncIOMotorClient(settings.MONGODB_URL)
+client = motor.motor_asyncio.AsyncIOMotorClient(
+    settings.MONGODB_URL,
+    maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+    minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+    connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+    serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+)
 try :
     db = client[settings.DB_NAME]
     print("Connected to MongoDB")
 except Exception as e:
-    print("Error: ", e)
\ No newline at end of file
+    print("Error: ", e)
+
+
+async def warm_pool(connections: int = settings.MONGO_MIN_POOL_SIZE):
+    """
+    Open `connections` pooled connections up front by running that many
+    pings at once, so the first requests after startup do not each pay for
+    a TCP and TLS handshake.
+    """
+    await asyncio.gather(
+        *(client.admin.command("ping") for _ in range(max(1, connections)))
+    )
+
+
+def close():
+    client.close()
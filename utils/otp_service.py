@@ -0,0 +1,119 @@
+from datetime import datetime, timezone
+from typing import Dict, Optional
+import httpx
+from .config import settings
+from .mongodb import db
+from .resilience import retry_with_jitter
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return False
+
+
+class TwilioVerifyBackend:
+    """
+    Twilio Verify over its REST API with a shared, pooled async HTTP client.
+    Transient failures (network errors, 429, 5xx) are retried with jitter.
+    """
+
+    BASE_URL = "https://verify.twilio.com/v2"
+
+    def __init__(self, account_sid: str, auth_token: str, service_sid: str):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.service_sid = service_sid
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.BASE_URL,
+                auth=(self.account_sid or "", self.auth_token or ""),
+                timeout=httpx.Timeout(settings.OTP_HTTP_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=settings.OTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OTP_MAX_CONNECTIONS,
+                ),
+            )
+        return self._client
+
+    async def _post(self, path: str, data: Dict) -> httpx.Response:
+        async def attempt():
+            response = await self._http().post(path, data=data)
+            if response.status_code == 429 or response.status_code >= 500:
+                response.raise_for_status()
+            return response
+
+        return await retry_with_jitter(attempt, _is_retryable)
+
+    async def send(self, phone: str) -> None:
+        response = await self._post(
+            f"/Services/{self.service_sid}/Verifications",
+            {"To": phone, "Channel": "sms"},
+        )
+        response.raise_for_status()
+
+    async def check(self, phone: str, code: str) -> bool:
+        response = await self._post(
+            f"/Services/{self.service_sid}/VerificationCheck",
+            {"To": phone, "Code": code},
+        )
+        # Twilio answers 404 once a verification has expired or been used.
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+        return response.json().get("status") == "approved"
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class FakeOTPBackend:
+    """
+    Local backend for development and tests: nothing is sent, and the code
+    for every phone is FAKE_OTP_CODE.
+    """
+
+    def __init__(self, code: str):
+        self.code = code
+
+    async def send(self, phone: str) -> None:
+        print(f"Fake OTP for {phone}: {self.code}")
+
+    async def check(self, phone: str, code: str) -> bool:
+        return code == self.code
+
+    async def close(self):
+        pass
+
+
+def _make_backend():
+    if settings.OTP_BACKEND == "fake":
+        return FakeOTPBackend(settings.FAKE_OTP_CODE)
+    return TwilioVerifyBackend(
+        settings.ACCOUNT_SID, settings.AUTH_TOKEN, settings.TWILIO_SERVICE_SID
+    )
+
+
+otp_backend = _make_backend()
+
+
+async def send_otp_in_background(phone: str):
+    """
+    Send an OTP after the response has gone out, recording when it was
+    sent. Failures are only logged; the request has already completed.
+    """
+    try:
+        await otp_backend.send(phone)
+    except Exception as e:
+        print(f"Error sending OTP: {e}")
+        return
+    await db.users.update_one(
+        {"phone": phone}, {"$set": {"otp_sent_at": datetime.now(timezone.utc)}}
+    )
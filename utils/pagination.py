@@ -0,0 +1,69 @@
+from typing import Dict, Optional
+from bson import ObjectId
+from fastapi import HTTPException
+from utils.responses import MongoJSONResponse
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Fields list endpoints return for a booking. qr_code and group_qr_codes
+# (legacy base64 images) are deliberately left out.
+BOOKING_LIST_PROJECTION = {
+    "user_id": 1,
+    "pass_id": 1,
+    "zone_id": 1,
+    "qr_payload": 1,
+    "is_group": 1,
+    "group_members": 1,
+    "amount_paid": 1,
+    "discount_applied": 1,
+    "status": 1,
+    "payment_status": 1,
+    "created_at": 1,
+}
+
+
+async def paginate(
+    collection,
+    query: Dict,
+    projection: Optional[Dict] = None,
+    after: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_total: bool = False,
+) -> MongoJSONResponse:
+    """
+    Keyset pagination over `_id`, newest first. Pass the previous page's
+    `next_after` as `after` to continue; it is None on the last page.
+
+    The page is returned as a MongoJSONResponse holding the raw documents, so
+    `projection` alone decides which fields are sent.
+
+    With include_total, the total matching `query` is returned too, using
+    the collection's metadata count when the query is unfiltered.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    page_query = dict(query)
+    if after:
+        if not ObjectId.is_valid(after):
+            raise HTTPException(status_code=400, detail="Invalid 'after' cursor")
+        page_query["_id"] = {"$lt": ObjectId(after)}
+
+    docs = (
+        await collection.find(page_query, projection)
+        .sort("_id", -1)
+        .limit(limit + 1)
+        .to_list(limit + 1)
+    )
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+
+    page = {
+        "items": docs,
+        "next_after": str(docs[-1]["_id"]) if has_more else None,
+    }
+    if include_total:
+        if query:
+            page["total"] = await collection.count_documents(query)
+        else:
+            page["total"] = await collection.estimated_document_count()
+    return MongoJSONResponse(page)
@@ -1,20 +1,87 @@
 from typing import Dict, Optional
 from datetime import datetime
-import razorpay
+import hashlib
+import hmac
+import httpx
 from fastapi import HTTPException, status
 from .config import settings
+from .resilience import (
+    Bulkhead,
+    BulkheadFullError,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+
+
+class GatewayError(Exception):
+    """Razorpay could not be reached or answered with a 5xx."""
+
+
+def _counts_as_outage(error: Exception) -> bool:
+    return isinstance(error, GatewayError)
 
 
 class PaymentService:
     def __init__(self):
-        self.razorpay_client = razorpay.Client(
-            auth=(
-                settings.RAZORPAY_KEY_ID,
-                settings.RAZORPAY_KEY_SECRET,
-            )
+        self.key_id = settings.RAZORPAY_KEY_ID
+        self.key_secret = settings.RAZORPAY_KEY_SECRET
+        self._client: Optional[httpx.AsyncClient] = None
+        self.breaker = CircuitBreaker(
+            "Razorpay",
+            failure_threshold=settings.RAZORPAY_BREAKER_FAILURES,
+            reset_seconds=settings.RAZORPAY_BREAKER_RESET_SECONDS,
+            counts_as_failure=_counts_as_outage,
+        )
+        self.bulkhead = Bulkhead(
+            "Razorpay",
+            max_concurrent=settings.RAZORPAY_MAX_CONCURRENT_CALLS,
+            wait_seconds=settings.RAZORPAY_BULKHEAD_WAIT_SECONDS,
         )
 
-    def create_razorpay_order(
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=settings.RAZORPAY_BASE_URL,
+                auth=(self.key_id or "", self.key_secret or ""),
+                timeout=httpx.Timeout(settings.RAZORPAY_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=settings.RAZORPAY_MAX_CONCURRENT_CALLS,
+                    max_keepalive_connections=settings.RAZORPAY_MAX_CONCURRENT_CALLS,
+                ),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _post(self, path: str, payload: Dict) -> httpx.Response:
+        """
+        POST to Razorpay through the bulkhead and circuit breaker. Transport
+        errors and 5xx responses count as outages; 4xx responses are
+        returned for the caller to interpret.
+        """
+
+        async def attempt():
+            try:
+                response = await self._http().post(path, json=payload)
+            except httpx.HTTPError as e:
+                raise GatewayError(str(e)) from e
+            if response.status_code >= 500:
+                raise GatewayError(f"HTTP {response.status_code}: {response.text}")
+            return response
+
+        try:
+            return await self.bulkhead.call(lambda: self.breaker.call(attempt))
+        except (CircuitOpenError, BulkheadFullError) as e:
+            print("Payment gateway unavailable:", e)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Payment gateway is busy, please retry shortly",
+            )
+
+    async def create_razorpay_order(
         self, username: str, email: str, product: str, amount: float
     ) -> Dict:
         """
@@ -50,7 +117,11 @@ class PaymentService:
         }
 
         try:
-            order = self.razorpay_client.order.create(data=options)
+            response = await self._post("/orders", options)
+            response.raise_for_status()
+            order = response.json()
+        except HTTPException:
+            raise
         except Exception as e:
             print("Error creating order:", e)
             raise HTTPException(
@@ -107,16 +178,12 @@ class PaymentService:
         Verify Razorpay payment signature
         """
         try:
-            params_dict = {
-                "razorpay_order_id": order_id,
-                "razorpay_payment_id": payment_id,
-                "razorpay_signature": signature,
-            }
-
-            self.razorpay_client.utility.verify_payment_signature(params_dict)
-            return True
-        except razorpay.errors.SignatureVerificationError:
-            return False
+            expected = hmac.new(
+                (self.key_secret or "").encode(),
+                f"{order_id}|{payment_id}".encode(),
+                hashlib.sha256,
+            ).hexdigest()
+            return hmac.compare_digest(expected, signature or "")
         except Exception as e:
             print(f"Payment verification failed: {str(e)}")
             return False
@@ -136,17 +203,23 @@ class PaymentService:
             if notes:
                 payload["notes"] = notes
 
-            refund_resp = self.razorpay_client.payment.refund(payment_id, payload)
-            return refund_resp
-        except razorpay.errors.BadRequestError as e:
-            raise HTTPException(
-                status_code=400, detail=f"Razorpay bad request: {str(e)}"
-            )
-        except razorpay.errors.ServerError as e:
+            response = await self._post(f"/payments/{payment_id}/refund", payload)
+        except HTTPException:
+            raise
+        except GatewayError as e:
             raise HTTPException(
                 status_code=502, detail=f"Razorpay server error: {str(e)}"
             )
         except Exception as e:
             raise HTTPException(
                 status_code=500, detail=f"Failed to create refund: {str(e)}"
-            )
\ No newline at end of file
+            )
+
+        if response.status_code >= 400:
+            raise HTTPException(
+                status_code=400, detail=f"Razorpay bad request: {response.text}"
+            )
+        return response.json()
+
+
+payment_service = PaymentService()
@@ -1,10 +1,12 @@
 import qrcode
 from io import BytesIO
-import base64
+from .config import settings
+from .executors import BoundedProcessPool
 
-def generate_qr_code(data: str) -> str:
+
+def generate_qr_png(data: str) -> bytes:
     """
-    Generate a QR code for the given data and return it as a base64 encoded string
+    Render a QR code for the given data as PNG bytes
     """
     qr = qrcode.QRCode(
         version=1,
@@ -16,8 +18,30 @@ def generate_qr_code(data: str) -> str:
     qr.make(fit=True)
 
     img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Convert the image to base64
+
     buffered = BytesIO()
     img.save(buffered, format="PNG")
-    return base64.b64encode(buffered.getvalue()).decode()
+    return buffered.getvalue()
+
+
+class QRRenderer:
+    """
+    Renders QR codes in a separate process pool so PNG encoding never runs on
+    the event loop. The pool is bounded: once QR_RENDER_QUEUE_SIZE renders
+    are outstanding, new work is rejected with 503.
+    """
+
+    def __init__(self, pool: BoundedProcessPool):
+        self.pool = pool
+
+    async def render(self, data: str) -> bytes:
+        return await self.pool.submit(generate_qr_png, data)
+
+
+qr_renderer = QRRenderer(
+    BoundedProcessPool(
+        "QR renderer",
+        workers=settings.QR_RENDER_WORKERS,
+        max_pending=settings.QR_RENDER_QUEUE_SIZE,
+    )
+)
@@ -0,0 +1,116 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+async def retry_with_jitter(
+    operation: Callable[[], Awaitable[T]],
+    retryable: Callable[[Exception], bool],
+    attempts: int = 3,
+    base_delay: float = 0.2,
+    max_delay: float = 2.0,
+) -> T:
+    """
+    Run `operation`, retrying failures that `retryable` accepts with
+    exponential backoff and full jitter, so a burst of callers that failed
+    together does not retry in lockstep.
+    """
+    for attempt in range(attempts):
+        try:
+            return await operation()
+        except Exception as e:
+            if attempt == attempts - 1 or not retryable(e):
+                raise
+            await asyncio.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class BulkheadFullError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency for `reset_seconds` after
+    `failure_threshold` consecutive failures, then lets a single trial call
+    through (half-open) to decide whether to close again. Only exceptions
+    accepted by `counts_as_failure` trip the breaker.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_seconds: float,
+        counts_as_failure: Callable[[Exception], bool] = lambda e: True,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.counts_as_failure = counts_as_failure
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    async def call(self, operation: Callable[[], Awaitable[T]]) -> T:
+        state = self.state
+        if state == "open" or (state == "half-open" and self._trial_running):
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        trial = state == "half-open"
+        if trial:
+            self._trial_running = True
+        try:
+            result = await operation()
+        except Exception as e:
+            if self.counts_as_failure(e):
+                self._record_failure()
+            raise
+        else:
+            self._failures = 0
+            self._opened_at = None
+            return result
+        finally:
+            if trial:
+                self._trial_running = False
+
+    def _record_failure(self):
+        self._failures += 1
+        if self._opened_at is not None or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+
+class Bulkhead:
+    """
+    Caps concurrent calls to a dependency. Callers wait at most
+    `wait_seconds` for a slot before BulkheadFullError is raised.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, wait_seconds: float):
+        self.name = name
+        self.wait_seconds = wait_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def call(self, operation: Callable[[], Awaitable[T]]) -> T:
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.wait_seconds)
+        except asyncio.TimeoutError:
+            raise BulkheadFullError(f"{self.name} has too many calls in flight")
+        try:
+            return await operation()
+        finally:
+            self._semaphore.release()
@@ -0,0 +1,33 @@
+from typing import Any
+import orjson
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode raw Mongo documents as JSON. ObjectId becomes its hex string and
+    datetimes are written in ISO 8601, matching what serialize_doc produced.
+    """
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class MongoJSONResponse(ORJSONResponse):
+    """
+    Default response class for the app.
+
+    Controllers for trusted list endpoints return one of these directly with
+    the documents exactly as Motor loaded them. FastAPI then skips
+    response_model validation and jsonable_encoder, and the only per-row work
+    left is orjson's. The query's projection is what decides which fields
+    go out, so it must never include secrets such as password hashes.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,26 +1,29 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from .config import settings
 from fastapi.security import APIKeyHeader
 from fastapi import HTTPException, status, Depends
 from utils.mongodb import db
 from bson import ObjectId
 from .serializers import serialize_doc
-from models.user import UserInDB
+from .cache import LRUCache
+from .cache_bus import CacheEvent, CacheEventKind, cache_bus
+from .hashing import (
+    pwd_context,
+    verify_password,
+    get_password_hash,
+    hash_password_async,
+    verify_password_async,
+)
+from models.user import Principal
 
 oauth2_scheme = APIKeyHeader(name="Authorization")
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+PRINCIPAL_PROJECTION = {"role": 1, "zone_id": 1, "name": 1, "email": 1}
+principal_cache = LRUCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
 
 
 def create_access_token(user_dict: dict, expires_delta: Optional[timedelta] = None):
@@ -57,25 +60,44 @@ def verify_token(token: str) -> Optional[dict]:
 expires_delta = settings.ACCESS_TOKEN_EXPIRE_TIME
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+async def invalidate_principal(user_id: str):
+    """
+    Drop a cached principal in every worker after the user's role, zone or
+    profile changes.
+    """
+    await cache_bus.publish(CacheEvent(CacheEventKind.USER, str(user_id)))
+
+
+async def _on_user_changed(event: CacheEvent):
+    if event.key is None:
+        principal_cache.clear()
+    else:
+        principal_cache.pop(event.key)
+
+
+cache_bus.subscribe(CacheEventKind.USER, _on_user_changed)
+
+
+async def load_principal(user_id: str) -> Optional[Principal]:
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        if not ObjectId.is_valid(user_id):
+            return None
+        user = await db.users.find_one(
+            {"_id": ObjectId(user_id)}, PRINCIPAL_PROJECTION
+        )
+        if not user:
+            return None
+        principal = Principal(**serialize_doc(user))
+        principal_cache.set(user_id, principal)
+    return principal
+
+
+def _decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        user_id: str = payload.get("id")
-        role: str = payload.get("role")
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials",
-            )
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials",
-            )
-        return user
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has expired"
@@ -84,13 +106,52 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
         )
+    if not payload.get("id"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+        )
+    return payload
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
+    payload = _decode_token(token)
+    user = await load_principal(payload["id"])
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+        )
+    return user
+
+
+async def get_token_principal(token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    Build the principal from the role/zone claims in the token without a
+    database read. Only for read-only routes: a role or zone change takes
+    effect there when the token is reissued.
+    """
+    payload = _decode_token(token)
+    zone_id = payload.get("zone_id")
+    try:
+        return Principal(
+            **{
+                "_id": payload["id"],
+                "role": payload.get("role"),
+                "zone_id": zone_id if zone_id not in (None, "", "None") else None,
+            }
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+        )
 
 
-async def check_admin_user(current_user: dict = Depends(get_current_user)):
+async def check_admin_user(current_user: Principal = Depends(get_current_user)):
     if current_user.get("role") != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to perform this action",
         )
-    serialized_user = serialize_doc(current_user)
-    return UserInDB(**serialized_user)
+    return current_user
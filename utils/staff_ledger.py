@@ -0,0 +1,124 @@
+"""
+Staff sales carry the booking figures reports need (amount, pass type,
+discount, zone, staff name), copied in when the sale is recorded, so sales
+reports group `staff_sales` alone without joining bookings or users.
+
+Fill those fields in on rows written before this existed with:
+
+    python -m utils.staff_ledger backfill
+"""
+import asyncio
+import sys
+from datetime import datetime
+from typing import Dict, Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from utils.mongodb import db
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def ledger_fields(
+    booking: Dict, pass_type: Optional[str], staff_name: Optional[str]
+) -> Dict:
+    return {
+        "amount": booking.get("amount_paid", 0) or 0,
+        "pass_type": pass_type,
+        "discount_applied": booking.get("discount_applied") or 0,
+        "zone_id": booking.get("zone_id"),
+        "staff_name": staff_name,
+    }
+
+
+async def pass_type_for(booking: Dict) -> Optional[str]:
+    """Bookings store their pass type since it was denormalised; older ones need a lookup."""
+    if booking.get("pass_type"):
+        return booking["pass_type"]
+    pass_id = booking.get("pass_id")
+    if not pass_id or not ObjectId.is_valid(pass_id):
+        return None
+    pass_ = await db["passes"].find_one({"_id": ObjectId(pass_id)}, {"type": 1})
+    return pass_.get("type") if pass_ else None
+
+
+async def _backfill_batch(sales) -> int:
+    booking_ids = [
+        ObjectId(sale["booking_id"])
+        for sale in sales
+        if ObjectId.is_valid(str(sale.get("booking_id")))
+    ]
+    staff_ids = [
+        ObjectId(sale["staff_id"])
+        for sale in sales
+        if ObjectId.is_valid(str(sale.get("staff_id")))
+    ]
+    bookings = {
+        str(doc["_id"]): doc
+        for doc in await db["bookings"]
+        .find(
+            {"_id": {"$in": booking_ids}},
+            {
+                "amount_paid": 1,
+                "discount_applied": 1,
+                "zone_id": 1,
+                "pass_id": 1,
+                "pass_type": 1,
+            },
+        )
+        .to_list(None)
+    }
+    pass_ids = {
+        ObjectId(doc["pass_id"])
+        for doc in bookings.values()
+        if not doc.get("pass_type") and ObjectId.is_valid(str(doc.get("pass_id")))
+    }
+    pass_types = {
+        str(doc["_id"]): doc.get("type")
+        for doc in await db["passes"]
+        .find({"_id": {"$in": list(pass_ids)}}, {"type": 1})
+        .to_list(None)
+    }
+    staff_names = {
+        str(doc["_id"]): doc.get("name")
+        for doc in await db["users"]
+        .find({"_id": {"$in": staff_ids}}, {"name": 1})
+        .to_list(None)
+    }
+
+    updates = []
+    for sale in sales:
+        booking = bookings.get(str(sale.get("booking_id")), {})
+        fields = ledger_fields(
+            {**booking, "zone_id": booking.get("zone_id") or sale.get("zone_id")},
+            booking.get("pass_type") or pass_types.get(str(booking.get("pass_id"))),
+            staff_names.get(str(sale.get("staff_id"))),
+        )
+        fields["ledger_backfilled_at"] = datetime.utcnow()
+        updates.append(UpdateOne({"_id": sale["_id"]}, {"$set": fields}))
+    if updates:
+        await db["staff_sales"].bulk_write(updates, ordered=False)
+    return len(updates)
+
+
+async def backfill() -> int:
+    """Denormalise every staff sale that predates the ledger fields."""
+    total = 0
+    while True:
+        sales = (
+            await db["staff_sales"]
+            .find(
+                {"amount": {"$exists": False}},
+                {"booking_id": 1, "staff_id": 1, "zone_id": 1},
+            )
+            .limit(BACKFILL_BATCH_SIZE)
+            .to_list(None)
+        )
+        if not sales:
+            return total
+        total += await _backfill_batch(sales)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["backfill"]:
+        raise SystemExit("usage: python -m utils.staff_ledger backfill")
+    print(f"Backfilled {asyncio.run(backfill())} staff sales")
@@ -0,0 +1,219 @@
+"""
+Dashboard counters kept in `stats_rollups`, incremented as bookings are
+created, admitted, cancelled and refunded, so dashboards read a handful of
+documents instead of aggregating `bookings`.
+
+Each event is added to hour, day, month and all-time buckets for the
+global, zone and pass scopes. Rebuild from scratch (e.g. after a backfill)
+with:
+
+    python -m utils.stats rebuild
+"""
+import asyncio
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from pymongo import UpdateOne
+from utils.mongodb import db
+
+COUNTERS = (
+    "bookings",
+    "revenue",
+    "online_bookings",
+    "offline_bookings",
+    "attendance",
+    "cancellations",
+    "refunds",
+    "refund_amount",
+)
+
+REBUILD_COLLECTION = "stats_rollups_rebuild"
+
+BUCKETS = {
+    "hour": "%Y%m%d%H",
+    "day": "%Y%m%d",
+    "month": "%Y%m",
+}
+
+# An event: (zone_id, pass_id, counter increments).
+Event = Tuple[Optional[str], Optional[str], Dict[str, float]]
+
+
+def rollup_id(scope: str, scope_id: str, bucket: str, at: Optional[datetime] = None) -> str:
+    period = "all" if bucket == "all" else at.strftime(BUCKETS[bucket])
+    return f"{scope}:{scope_id}:{bucket}:{period}"
+
+
+def _rollup_ids(
+    zone_id: Optional[str], pass_id: Optional[str], at: datetime
+) -> Iterable[Tuple[str, str, str]]:
+    scopes = [("global", "")]
+    if zone_id:
+        scopes.append(("zone", str(zone_id)))
+    if pass_id:
+        scopes.append(("pass", str(pass_id)))
+    for scope, scope_id in scopes:
+        for bucket in (*BUCKETS, "all"):
+            yield rollup_id(scope, scope_id, bucket, at), scope, scope_id
+
+
+def _accumulate(events: Iterable[Event], at: datetime, into: Dict[str, Dict]):
+    for zone_id, pass_id, increments in events:
+        for _id, scope, scope_id in _rollup_ids(zone_id, pass_id, at):
+            entry = into.setdefault(
+                _id, {"scope": scope, "scope_id": scope_id, "inc": defaultdict(int)}
+            )
+            for counter, amount in increments.items():
+                entry["inc"][counter] += amount
+
+
+async def record_events(events: List[Event], at: Optional[datetime] = None):
+    """
+    Apply several events with one unordered bulk_write. Failures are only
+    logged: the booking write they describe has already happened, and a
+    rebuild can restore exact figures.
+    """
+    rollups: Dict[str, Dict] = {}
+    _accumulate(events, at or datetime.utcnow(), rollups)
+    if not rollups:
+        return
+    try:
+        await db["stats_rollups"].bulk_write(
+            [
+                UpdateOne(
+                    {"_id": _id},
+                    {
+                        "$inc": dict(entry["inc"]),
+                        "$setOnInsert": {
+                            "scope": entry["scope"],
+                            "scope_id": entry["scope_id"],
+                        },
+                    },
+                    upsert=True,
+                )
+                for _id, entry in rollups.items()
+            ],
+            ordered=False,
+        )
+    except Exception as e:
+        print("Error updating stats rollups:", e)
+
+
+async def record_event(
+    zone_id: Optional[str],
+    pass_id: Optional[str],
+    at: Optional[datetime] = None,
+    **increments,
+):
+    await record_events([(zone_id, pass_id, increments)], at)
+
+
+def booking_created_event(booking: Dict) -> Event:
+    online = booking.get("sold_by") == "online"
+    return (
+        booking.get("zone_id"),
+        booking.get("pass_id"),
+        {
+            "bookings": 1,
+            "revenue": booking.get("amount_paid", 0) or 0,
+            "online_bookings": 1 if online else 0,
+            "offline_bookings": 0 if online else 1,
+        },
+    )
+
+
+def _period_ids(scope: str, scope_id: str, period: str, now: datetime) -> List[str]:
+    if period == "today":
+        return [rollup_id(scope, scope_id, "day", now)]
+    if period == "week":
+        return [
+            rollup_id(scope, scope_id, "day", now - timedelta(days=offset))
+            for offset in range(now.weekday() + 1)
+        ]
+    if period == "month":
+        return [rollup_id(scope, scope_id, "month", now)]
+    return [rollup_id(scope, scope_id, "all")]
+
+
+async def read_totals(
+    scope: str = "global", scope_id: str = "", period: str = "all"
+) -> Dict[str, float]:
+    """Sum the counters of the buckets covering `period` (today, week, month or all)."""
+    ids = _period_ids(scope, str(scope_id), period, datetime.utcnow())
+    docs = await db["stats_rollups"].find({"_id": {"$in": ids}}).to_list(len(ids))
+    totals = {counter: 0 for counter in COUNTERS}
+    for doc in docs:
+        for counter in COUNTERS:
+            totals[counter] += doc.get(counter, 0)
+    return totals
+
+
+async def rebuild():
+    """
+    Recompute every rollup from `bookings` into a scratch collection, then
+    rename it over `stats_rollups` in one step, so dashboards never read a
+    half-built set and live increments never collide with the rebuild.
+    Increments recorded while the scan runs are dropped by the swap; run it
+    again (or when bookings are quiet) if exact figures matter.
+    """
+    rollups: Dict[str, Dict] = {}
+    cursor = db["bookings"].find(
+        {},
+        {
+            "zone_id": 1,
+            "pass_id": 1,
+            "amount_paid": 1,
+            "sold_by": 1,
+            "status": 1,
+            "created_at": 1,
+            "used_at": 1,
+            "updated_at": 1,
+            "refund_id": 1,
+            "refund_amount": 1,
+        },
+    ).batch_size(1000)
+    async for booking in cursor:
+        created_at = booking.get("created_at") or booking[
+            "_id"
+        ].generation_time.replace(tzinfo=None)
+        zone_id, pass_id = booking.get("zone_id"), booking.get("pass_id")
+        _accumulate([booking_created_event(booking)], created_at, rollups)
+
+        if booking.get("status") == "used":
+            increments = {"attendance": 1}
+            at = booking.get("used_at") or created_at
+        elif booking.get("status") == "cancelled":
+            increments = {"cancellations": 1}
+            if booking.get("refund_id"):
+                increments["refunds"] = 1
+                increments["refund_amount"] = booking.get("refund_amount", 0) or 0
+            at = booking.get("updated_at") or created_at
+        else:
+            continue
+        _accumulate([(zone_id, pass_id, increments)], at, rollups)
+
+    docs = [
+        {
+            "_id": _id,
+            "scope": entry["scope"],
+            "scope_id": entry["scope_id"],
+            **entry["inc"],
+        }
+        for _id, entry in rollups.items()
+    ]
+    scratch = db[REBUILD_COLLECTION]
+    await scratch.drop()
+    for start in range(0, len(docs), 1000):
+        await scratch.insert_many(docs[start:start + 1000])
+    if docs:
+        await scratch.rename("stats_rollups", dropTarget=True)
+    else:
+        await db["stats_rollups"].delete_many({})
+    return len(docs)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        raise SystemExit("usage: python -m utils.stats rebuild")
+    print(f"Rebuilt {asyncio.run(rebuild())} rollup documents")